@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
@@ -8,7 +8,10 @@ import uuid
 import json
 import time
 import shutil
+import gzip
+import hashlib
 from pathlib import Path
+from urllib.parse import unquote
 import werkzeug.utils
 
 # Set up logging
@@ -96,6 +99,24 @@ base_dir = os.environ.get('APP_BASE_DIR', '/app')
 OUTPUT_DIR = os.path.join(base_dir, "tiles_output")
 ALLOWED_EXTENSIONS = {'pdf'}
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB limit
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Raw PDF uploads are written to disk 1MB at a time
+GZIP_MIN_BYTES = 1024  # JSON responses smaller than this aren't worth compressing
+
+@app.after_request
+def gzip_json_response(response):
+    """Gzip JSON bodies (job status with results, drawing lists) for clients that accept it"""
+    if (response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -131,6 +152,21 @@ jobs = {}
 # Dictionary to track active analysis threads
 active_analysis_threads = {}
 
+# Condition notified on every job update so event streams can push changes
+# as they happen instead of clients polling /job-status. Jobs are changed
+# with it held, and each change bumps the job's "version".
+job_updates = threading.Condition()
+JOB_EVENTS_HEARTBEAT_SECONDS = 10
+# An open event stream holds a worker thread (gunicorn runs 8), so only this
+# many may be open at once - further clients get a 503 and poll /job-status.
+# Streams are also closed after a fixed lifetime; clients reconnect with
+# ?since if they are still following the job.
+MAX_JOB_EVENT_STREAMS = 4
+JOB_EVENTS_MAX_STREAM_SECONDS = 120
+job_event_streams = threading.BoundedSemaphore(MAX_JOB_EVENT_STREAMS)
+TERMINAL_JOB_STATUSES = ("completed", "failed", "stopped")
+MAX_PROGRESS_MESSAGES = 1000  # Oldest progress messages are dropped past this
+
 # --- User Path Helper Function ---
 def get_user_path(user_id=None):
     """
@@ -205,41 +241,87 @@ def allowed_file(filename):
     """Check if filename has an allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def append_progress_message(job, message):
+    """
+    Append a progress message to a job in place, keeping only the newest
+    MAX_PROGRESS_MESSAGES. message_count keeps counting every message so
+    clients can tell how many arrived even once old ones are dropped.
+    """
+    messages = job.setdefault("progress_messages", [])
+    messages.append(message)
+    job["message_count"] = job.get("message_count", 0) + 1
+    overflow = len(messages) - MAX_PROGRESS_MESSAGES
+    if overflow > 0:
+        del messages[:overflow]
+
+def job_snapshot(job, since=None):
+    """
+    A copy of the job as sent to clients; call with job_updates held so the
+    messages and message_count come from the same update. With since (a
+    message_count the client has already seen), progress_messages carries
+    only the messages after it, so polls and pushes don't resend the whole
+    history.
+    """
+    snapshot = dict(job)
+    messages = job.get("progress_messages", [])
+    if since is None:
+        snapshot["progress_messages"] = list(messages)
+        return snapshot
+    new_count = job.get("message_count", 0) - since
+    snapshot["progress_messages"] = messages[max(len(messages) - new_count, 0):] if new_count > 0 else []
+    return snapshot
+
+def notify_job_changed(job):
+    """Bump a job's version and wake the event streams; call with job_updates held"""
+    job["version"] = job.get("version", 0) + 1
+    job_updates.notify_all()
+
+def job_version(job_id):
+    """Current version of a job, or None once it no longer exists"""
+    job = jobs.get(job_id)
+    return job.get("version", 0) if job is not None else None
+
 def update_job_status(job_id, status, progress=0, phase=None, result=None, error=None, message=None):
     """Update job status in memory (would use a database in production)"""
-    if job_id not in jobs:
-        jobs[job_id] = {
-            "id": job_id,
-            "status": "created",
-            "progress": 0,
-            "phase": None,
-            "created_at": time.time(),
-            "updated_at": time.time(),
-            "result": None,
-            "error": None,
-            "progress_messages": [],
-            "is_running": True  # Always start as running
-        }
-    
-    jobs[job_id]["status"] = status
-    jobs[job_id]["progress"] = progress
-    jobs[job_id]["updated_at"] = time.time()
-    
-    # Only update is_running flag if explicitly set to a stopped state
-    if status in ["completed", "failed"]:
-        jobs[job_id]["is_running"] = False
-    # Don't change the is_running flag for "queued" or "processing" - let it stay as initially set
-    
-    if phase:
-        jobs[job_id]["phase"] = phase
-    if result:
-        jobs[job_id]["result"] = result
-    if error:
-        jobs[job_id]["error"] = error
-    if message:
-        jobs[job_id]["progress_messages"] = jobs[job_id].get("progress_messages", []) + [message]
-    
-    logger.info(f"Updated job {job_id}: status={status}, progress={progress}, phase={phase}, is_running={jobs[job_id]['is_running']}")
+    with job_updates:
+        if job_id not in jobs:
+            jobs[job_id] = {
+                "id": job_id,
+                "status": "created",
+                "progress": 0,
+                "phase": None,
+                "created_at": time.time(),
+                "updated_at": time.time(),
+                "result": None,
+                "error": None,
+                "progress_messages": [],
+                "message_count": 0,
+                "is_running": True  # Always start as running
+            }
+        
+        jobs[job_id]["status"] = status
+        jobs[job_id]["progress"] = progress
+        jobs[job_id]["updated_at"] = time.time()
+        
+        # Only update is_running flag if explicitly set to a stopped state
+        if status in ["completed", "failed"]:
+            jobs[job_id]["is_running"] = False
+        # Don't change the is_running flag for "queued" or "processing" - let it stay as initially set
+        
+        if phase:
+            jobs[job_id]["phase"] = phase
+        if result:
+            jobs[job_id]["result"] = result
+        if error:
+            jobs[job_id]["error"] = error
+        if message:
+            append_progress_message(jobs[job_id], message)
+        
+        # Wake up any event streams following this job
+        notify_job_changed(jobs[job_id])
+        is_running = jobs[job_id]['is_running']
+    
+    logger.info(f"Updated job {job_id}: status={status}, progress={progress}, phase={phase}, is_running={is_running}")
 
 def process_pdf_file(pdf_path, job_id, original_filename):
     """Process PDF file using the tile generator and tile analyzer directly"""
@@ -440,6 +522,30 @@ def health_check():
     
     return jsonify(status)
 
+def list_drawings(user_id=None):
+    """Drawings available to a user (or the global workspace)"""
+    if user_id:
+        # Use temporary DrawingManager with user-specific path
+        user_path = get_user_path(user_id)
+        # Only if DrawingManager class is available
+        if DrawingManager:
+            temp_manager = DrawingManager(user_path)
+            drawings = temp_manager.get_available_drawings()
+            logger.info(f"Retrieved {len(drawings)} drawings for user {user_id}")
+        else:
+            # Fallback if DrawingManager is not available
+            logger.error("DrawingManager not available, cannot get user drawings")
+            drawings = []
+    else:
+        # Use global drawing manager (existing behavior)
+        drawings = drawing_manager.get_available_drawings()
+        logger.info(f"Retrieved {len(drawings)} drawings (no user specified)")
+    return drawings
+
+def drawings_version(drawings):
+    """Short fingerprint of a drawings list; changes whenever the list does"""
+    return hashlib.sha1("\n".join(sorted(drawings)).encode("utf-8")).hexdigest()[:16]
+
 @app.route('/drawings', methods=['GET'])
 def get_drawings():
     """Get list of available drawings"""
@@ -449,40 +555,64 @@ def get_drawings():
     try:
         # Get user_id from request parameters
         user_id = request.args.get('user_id')
-        
-        if user_id:
-            # Use temporary DrawingManager with user-specific path
-            user_path = get_user_path(user_id)
-            # Only if DrawingManager class is available
-            if DrawingManager:
-                temp_manager = DrawingManager(user_path)
-                drawings = temp_manager.get_available_drawings()
-                logger.info(f"Retrieved {len(drawings)} drawings for user {user_id}")
-            else:
-                # Fallback if DrawingManager is not available
-                logger.error("DrawingManager not available, cannot get user drawings")
-                drawings = []
-        else:
-            # Use global drawing manager (existing behavior)
-            drawings = drawing_manager.get_available_drawings()
-            logger.info(f"Retrieved {len(drawings)} drawings (no user specified)")
-        
-        return jsonify({"drawings": drawings})
+        return jsonify({"drawings": list_drawings(user_id)})
     except Exception as e:
         logger.error(f"Error listing drawings: {e}", exc_info=True)
         return jsonify({"error": f"Failed to list drawings: {str(e)}"}), 500
 
+@app.route('/ui-state', methods=['GET'])
+def get_ui_state():
+    """
+    The drawings list, with its version.
+    'drawings' is only included when the list's version differs from the
+    'drawings_version' the client says it already has.
+    """
+    if not drawing_manager:
+        return jsonify({"error": "Drawing manager not available"}), 500
+    
+    try:
+        state = {}
+        drawings = list_drawings(request.args.get('user_id'))
+        state["drawings_version"] = drawings_version(drawings)
+        if state["drawings_version"] != request.args.get('drawings_version'):
+            state["drawings"] = drawings
+        
+        return jsonify(state)
+    except Exception as e:
+        logger.error(f"Error building UI state: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to get UI state: {str(e)}"}), 500
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload and processing"""
-    if 'file' not in request.files:
-        return jsonify({"error": "No file part"}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
-    
-    if not allowed_file(file.filename):
+    """
+    Handle file upload and processing.
+    Accepts either a multipart form with a 'file' part, or the raw PDF as the
+    request body (Content-Type: application/pdf, name in X-Filename), which
+    is written to disk in chunks as it arrives.
+    """
+    raw_upload = request.mimetype == 'application/pdf'
+    if raw_upload:
+        file = None
+        filename = unquote(request.headers.get('X-Filename', ''))
+        if not filename:
+            return jsonify({"error": "Missing X-Filename header"}), 400
+        # The raw body is read straight from request.stream, which (unlike
+        # the form parser) doesn't enforce MAX_CONTENT_LENGTH, and reads as
+        # empty without a Content-Length - check both before writing anything
+        if not request.content_length:
+            return jsonify({"error": "Missing or empty request body"}), 400
+        if request.content_length > app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({"error": "File too large"}), 413
+    else:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file part"}), 400
+        
+        file = request.files['file']
+        filename = file.filename
+        if filename == '':
+            return jsonify({"error": "No selected file"}), 400
+    
+    if not allowed_file(filename):
         return jsonify({"error": f"File type not allowed. Supported types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
     
     try:
@@ -491,7 +621,7 @@ def upload_file():
         logger.info(f"Upload request for user_id: {user_id}")
         
         # Create sanitized filename
-        safe_filename = werkzeug.utils.secure_filename(file.filename)
+        safe_filename = werkzeug.utils.secure_filename(filename)
         sheet_name = Path(safe_filename).stem.replace(" ", "_").replace("-", "_").replace(".", "_")
         
         # Get user-specific base path
@@ -503,13 +633,17 @@ def upload_file():
         
         # Save uploaded file
         pdf_path = sheet_dir / f"{sheet_name}.pdf"
-        file.save(pdf_path)
+        if raw_upload:
+            with open(pdf_path, 'wb') as out:
+                shutil.copyfileobj(request.stream, out, UPLOAD_CHUNK_SIZE)
+        else:
+            file.save(pdf_path)
         logger.info(f"Saved uploaded file to {pdf_path} for user {user_id}")
         
         # Create job with user_id stored in it
         job_id = str(uuid.uuid4())
         update_job_status(job_id, "queued", 0, "queued", 
-                         message=f"Queued file for processing: {file.filename}")
+                         message=f"Queued file for processing: {filename}")
         
         # Store user_id in the job data for later use
         if job_id in jobs:
@@ -519,7 +653,7 @@ def upload_file():
         # may need to be modified separately to handle user_id
         thread = threading.Thread(
             target=process_pdf_file,
-            args=(pdf_path, job_id, file.filename)
+            args=(pdf_path, job_id, filename)
         )
         thread.daemon = True
         thread.start()
@@ -596,14 +730,16 @@ def stop_analysis(job_id):
     if job.get("status") in ["completed", "failed", "stopped"]:
         return jsonify({"message": f"Job {job_id} is already {job.get('status')}"})
     
-    # Mark the job as stopped - set both status and is_running flag
-    jobs[job_id]["status"] = "stopped"
-    jobs[job_id]["is_running"] = False
-    
-    # Add a message about the stop
-    if "progress_messages" not in jobs[job_id]:
-        jobs[job_id]["progress_messages"] = []
-    jobs[job_id]["progress_messages"].append("Analysis stopped by user request")
+    with job_updates:
+        # Mark the job as stopped - set both status and is_running flag
+        jobs[job_id]["status"] = "stopped"
+        jobs[job_id]["is_running"] = False
+        
+        # Add a message about the stop
+        append_progress_message(jobs[job_id], "Analysis stopped by user request")
+        
+        # Wake up any event streams following this job
+        notify_job_changed(jobs[job_id])
     
     logger.info(f"Stopped job {job_id} by user request")
     
@@ -611,12 +747,71 @@ def stop_analysis(job_id):
 
 @app.route('/job-status/<job_id>', methods=['GET'])
 def get_job_status(job_id):
-    """Get status of a job"""
+    """Get status of a job; ?since=<message_count> returns only newer progress messages"""
     if job_id not in jobs:
         return jsonify({"error": "Job not found"}), 404
     
     # Return the entire job object
-    return jsonify(jobs[job_id])
+    with job_updates:
+        snapshot = job_snapshot(jobs[job_id], request.args.get('since', type=int))
+    return jsonify(snapshot)
+
+@app.route('/job-events/<job_id>', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream job status snapshots as Server-Sent Events until the job finishes
+    or the stream reaches JOB_EVENTS_MAX_STREAM_SECONDS. With
+    ?since=<message_count>, each event carries only the progress messages
+    that arrived after the previous one.
+    """
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    if not job_event_streams.acquire(blocking=False):
+        return jsonify({"error": "Too many open event streams, poll /job-status instead"}), 503
+    since = request.args.get('since', type=int)
+    
+    def generate():
+        nonlocal since
+        seen = None
+        stream_ends = time.monotonic() + JOB_EVENTS_MAX_STREAM_SECONDS
+        while True:
+            with job_updates:
+                # The version is checked with the lock held, so an update made
+                # while the previous event was being sent is never missed
+                timeout = min(JOB_EVENTS_HEARTBEAT_SECONDS, max(stream_ends - time.monotonic(), 0))
+                changed = job_updates.wait_for(lambda: job_version(job_id) != seen, timeout=timeout)
+                job = jobs.get(job_id)
+                if job is None:
+                    return
+                if changed:
+                    seen = job.get("version", 0)
+                    event = job_snapshot(job, since)
+                    if since is not None:
+                        since = event["message_count"]
+                    data = json.dumps(event, default=str)
+                    finished = job.get("status") in TERMINAL_JOB_STATUSES
+            
+            if changed:
+                yield f"data: {data}\n\n"
+                # The final snapshot has been sent, close the stream
+                if finished:
+                    return
+            else:
+                # Keep-alive comment so proxies don't drop an idle connection
+                yield ": keep-alive\n\n"
+            
+            if time.monotonic() >= stream_ends:
+                return
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Runs when the server closes the response, even if the client went away
+    # before the stream started
+    response.call_on_close(job_event_streams.release)
+    return response
 
 @app.route('/delete_drawing/<path:drawing_name>', methods=['DELETE'])
 def delete_drawing(drawing_name):
@@ -665,6 +860,55 @@ def delete_drawing(drawing_name):
         logger.error(f"Error deleting drawing {drawing_name}: {e}", exc_info=True)
         return jsonify({"error": f"Failed to delete drawing: {str(e)}"}), 500
 
+@app.route('/delete_drawings', methods=['POST'])
+def delete_drawings():
+    """Delete several drawings in one request; refreshes the drawing manager once"""
+    if not drawing_manager:
+        return jsonify({"error": "Drawing manager not available"}), 500
+    
+    data = request.get_json(silent=True) or {}
+    drawing_names = data.get('drawings')
+    if not isinstance(drawing_names, list) or not drawing_names:
+        return jsonify({"error": "Request body must contain a non-empty 'drawings' list"}), 400
+    
+    # Get user_id from query parameters
+    user_id = request.args.get('user_id')
+    base_dir = Path(get_user_path(user_id))
+    
+    if user_id:
+        logger.info(f"Attempting to delete {len(drawing_names)} drawings for user {user_id}")
+    else:
+        logger.info(f"Attempting to delete {len(drawing_names)} drawings from global space")
+    
+    results = {}
+    deleted_any = False
+    for drawing_name in drawing_names:
+        # Only plain directory names - never a path out of the user's space
+        if not isinstance(drawing_name, str) or drawing_name in ('', '.', '..') or Path(drawing_name).name != drawing_name:
+            results[str(drawing_name)] = {"error": "Invalid drawing name", "status": 400}
+            continue
+        
+        drawing_dir = base_dir / drawing_name
+        if not drawing_dir.is_dir():
+            results[drawing_name] = {"error": f"Drawing {drawing_name} not found", "status": 404}
+            continue
+        
+        try:
+            shutil.rmtree(drawing_dir)
+            deleted_any = True
+            logger.info(f"Deleted drawing: {drawing_name}")
+            results[drawing_name] = {"success": True, "status": 200}
+        except Exception as e:
+            logger.error(f"Error deleting drawing {drawing_name}: {e}", exc_info=True)
+            results[drawing_name] = {"error": f"Failed to delete drawing: {str(e)}", "status": 500}
+    
+    # Refresh the global drawing manager once for the whole batch (original behavior
+    # of the single delete; per-user managers are built on demand)
+    if deleted_any and not user_id:
+        refresh_drawing_manager()
+    
+    return jsonify({"success": all(r.get("success") for r in results.values()), "results": results})
+
 @app.route('/clear-cache', methods=['DELETE'])
 def clear_cache():
     """Clear the memory cache used by the analyzer"""
@@ -4,10 +4,18 @@ import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) # Disables warnings for verify=False
 
 import requests
+from requests.adapters import HTTPAdapter # Connection pooling for the shared session
+from urllib3.util.retry import Retry # Retry policy for transient connection failures
 import logging # Import the logging library
 import os # Import os for env vars
 from urllib.parse import quote #<-- Import quote for URL encoding
 import re # For string cleanup
+import json # For decoding Server-Sent Event payloads
+import time # For tracking when the backend last answered
+try:
+    import orjson # Faster decoding of large job/analysis payloads, if installed
+except ImportError:
+    orjson = None
 
 # --- Add Logging Setup ---
 # Configure logging to show messages from this client
@@ -27,16 +35,64 @@ if not API_BASE_URL:
     # but in production, it should be set.
 # --- End API_BASE_URL Loading ---
 
+# --- Shared HTTP Session ---
+# One pooled session for every call so keep-alive connections are reused
+# instead of paying a fresh TCP/TLS handshake per request (the UI polls job
+# status repeatedly while an analysis or upload is running).
+_last_success_at = None # time.monotonic() of the last 2xx/3xx response
+
+def _record_success(resp, *args, **kwargs):
+    """Response hook: remember when the backend last answered successfully."""
+    global _last_success_at
+    if resp.ok:
+        _last_success_at = time.monotonic()
+
+def seconds_since_last_success():
+    """Seconds since any API call last succeeded (infinity if none has yet)."""
+    if _last_success_at is None:
+        return float("inf")
+    return time.monotonic() - _last_success_at
+
+def _decode_json(resp):
+    """resp.json(), decoded with orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+def create_session():
+    """Build a requests.Session with connection pooling and connect retries."""
+    session = requests.Session()
+    session.hooks['response'].append(_record_success)
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, read=False, backoff_factor=0.2) # Don't replay requests the server may already be handling
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+_SESSION = create_session()
+
+def use_session(session):
+    """
+    Route all API calls through the given session, e.g. a process-wide one
+    owned by the Streamlit runtime (st.cache_resource).
+    """
+    global _SESSION
+    _SESSION = session
+# --- End Shared HTTP Session ---
+
 
 def health_check():
     """Ping the API to make sure it's up."""
     if not API_BASE_URL: return {"status": "error", "message": "Backend URL not configured"}
     url = f"{API_BASE_URL}/health"
-    logger.info(f"Sending health check to: {url}")
+    logger.info("Sending health check to: %s", url)
     try:
-        resp = requests.get(url, verify=False, timeout=10) # Added timeout
+        resp = _SESSION.get(url, verify=False, timeout=10) # Added timeout
         resp.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-        return resp.json()
+        return _decode_json(resp)
     except requests.exceptions.RequestException as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "error": str(e)}
@@ -44,12 +100,14 @@ def health_check():
         logger.error(f"Unexpected error during health check: {e}")
         return {"status": "error", "message": f"Unexpected error: {str(e)}"}
 
-def get_drawings(user_id=None):
+def get_drawings(user_id=None, raise_errors=False):
     """
     Fetch the list of available drawings you can analyze.
     
     Args:
         user_id (str, optional): The user ID to get drawings for (isolates workspaces)
+        raise_errors (bool, optional): Re-raise failures instead of returning an
+            empty list, so callers can tell "no drawings" from "couldn't fetch"
     """
     if not API_BASE_URL: 
         logger.error("Cannot get drawings: BACKEND_API_URL not configured.")
@@ -61,45 +119,48 @@ def get_drawings(user_id=None):
     params = {}
     if user_id:
         params['user_id'] = user_id
-        logger.info(f"Fetching drawings for user_id: {user_id}")
+        logger.info("Fetching drawings for user_id: %s", user_id)
     else:
         logger.info("Fetching drawings without user_id (global workspace)")
     
-    logger.info(f"Fetching drawings from: {url} with params: {params}")
+    logger.info("Fetching drawings from: %s with params: %s", url, params)
     
     try:
         # Log the exact request we're making
-        logger.info(f"Making GET request to {url} with params={params}, verify=False and timeout=60")
+        logger.debug("Making GET request to %s with params=%s, verify=False and timeout=60", url, params)
         
         # Make the API call with user_id parameter
-        resp = requests.get(url, params=params, verify=False, timeout=60)
+        resp = _SESSION.get(url, params=params, verify=False, timeout=60)
         
         # Log the raw response
-        logger.info(f"Received response from {url}, status code: {resp.status_code}")
-        logger.info(f"Response headers: {resp.headers}")
+        logger.info("Received response from %s, status code: %s", url, resp.status_code)
+        logger.debug("Response headers: %s", resp.headers)
         
         # Log the raw response content for debugging
         response_text = resp.text
-        logger.info(f"Raw response text: {response_text[:1000]}") # Log first 1000 chars in case response is large
+        logger.debug("Raw response text: %.1000s", response_text) # Log first 1000 chars in case response is large
         
         # Check for errors
         resp.raise_for_status()
         
         # Try to parse the JSON
         try:
-            data = resp.json()
-            logger.info(f"Successfully parsed JSON response: {data}")
+            data = _decode_json(resp)
+            logger.debug("Successfully parsed JSON response: %s", data)
             
             # Extract the drawings list
             drawings = data.get("drawings", [])
             
             # Log the number and content of drawings
-            logger.info(f"Retrieved {len(drawings)} drawings: {drawings}")
+            logger.info("Retrieved %d drawings", len(drawings))
+            logger.debug("Drawings: %s", drawings)
             
             return drawings
         except Exception as json_err:
             logger.error(f"Failed to parse response as JSON: {json_err}")
             logger.error(f"Response text that failed parsing: {response_text[:500]}")
+            if raise_errors:
+                raise
             return []
             
     except requests.exceptions.RequestException as e:
@@ -108,15 +169,56 @@ def get_drawings(user_id=None):
         if hasattr(e, 'response') and e.response is not None:
             logger.error(f"Error response status code: {e.response.status_code}")
             logger.error(f"Error response text: {e.response.text[:500]}")
+        if raise_errors:
+            raise
         return [] # Return empty list on error
     except Exception as e:
         logger.error(f"Unexpected error getting drawings: {e}")
+        if raise_errors:
+            raise
         return []
 
 
+def get_ui_state(drawings_version=None, user_id=None):
+    """
+    Fetch the drawings list, unless it is unchanged.
+    
+    Args:
+        drawings_version (str, optional): Version of the drawings list already held;
+            the list is left out of the reply when it hasn't changed
+        user_id (str, optional): The user ID to get drawings for (isolates workspaces)
+    
+    Returns:
+        A dict with 'drawings_version' and, if the list changed, 'drawings',
+        or None if the request failed (callers fall back to get_drawings).
+    """
+    if not API_BASE_URL:
+        logger.error("Cannot get UI state: BACKEND_API_URL not configured.")
+        return None
+    
+    url = f"{API_BASE_URL}/ui-state"
+    params = {}
+    if drawings_version:
+        params['drawings_version'] = drawings_version
+    if user_id:
+        params['user_id'] = user_id
+    logger.debug("Getting UI state from %s with params: %s", url, params)
+    
+    try:
+        resp = _SESSION.get(url, params=params, verify=False, timeout=60)
+        resp.raise_for_status()
+        return _decode_json(resp)
+    except Exception as e:
+        logger.warning(f"Failed to get UI state: {e}")
+        return None
+
+
 def upload_drawing(file_data, original_filename, user_id=None):
     """
     Upload a PDF file for processing directly without using temporary files.
+    The PDF is sent as the raw request body rather than a multipart form, so
+    file paths and file-like objects are streamed from their current position
+    instead of being copied into an encoded form body first.
     
     Args:
         file_data: Can be either a file-like object, bytes, or a file path string
@@ -139,28 +241,19 @@ def upload_drawing(file_data, original_filename, user_id=None):
     logger.info(f"Attempting to upload: {original_filename} to {api_url}")
 
     try:
+        # The filename travels in a header; user_id is already in the query string
+        headers = {"Content-Type": "application/pdf", "X-Filename": quote(original_filename)}
+        
         # Handle different input types
         if isinstance(file_data, str) and os.path.exists(file_data):
             # It's a file path
             with open(file_data, "rb") as f:
-                # Include user_id in form data as well (for robustness)
-                form_data = {}
-                if user_id:
-                    form_data['user_id'] = user_id
-                
-                files = {"file": (original_filename, f, 'application/pdf')}
-                logger.info(f"POSTing file from path to {api_url} with form_data: {form_data}...")
-                resp = requests.post(api_url, files=files, data=form_data, verify=False, timeout=300)
+                logger.info(f"POSTing file from path to {api_url}...")
+                resp = _SESSION.post(api_url, data=f, headers=headers, verify=False, timeout=300)
         else:
             # It's bytes or a file-like object
-            # Include user_id in form data as well (for robustness)
-            form_data = {}
-            if user_id:
-                form_data['user_id'] = user_id
-                
-            files = {"file": (original_filename, file_data, 'application/pdf')}
-            logger.info(f"POSTing file data to {api_url} with form_data: {form_data}...")
-            resp = requests.post(api_url, files=files, data=form_data, verify=False, timeout=300)
+            logger.info(f"POSTing file data to {api_url}...")
+            resp = _SESSION.post(api_url, data=file_data, headers=headers, verify=False, timeout=300)
         
         logger.info(f"Received response from {api_url}")
         logger.info(f"Upload Response Status Code: {resp.status_code}")
@@ -231,9 +324,9 @@ def start_analysis(query, drawings, use_cache=True, user_id=None):
         payload["user_id"] = user_id
     
     try:
-        resp = requests.post(url, json=payload, params=params, verify=False, timeout=300)
+        resp = _SESSION.post(url, json=payload, params=params, verify=False, timeout=300)
         resp.raise_for_status()
-        return resp.json()
+        return _decode_json(resp)
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to start analysis: {e}")
         return {"error": str(e)}
@@ -241,15 +334,20 @@ def start_analysis(query, drawings, use_cache=True, user_id=None):
         logger.error(f"Unexpected error starting analysis: {e}")
         return {"error": f"Unexpected error: {str(e)}"}
 
-def get_job_status(job_id):
-    """Check on a running job's status and progress."""
+def get_job_status(job_id, since=None):
+    """
+    Check on a running job's status and progress.
+    With since (a message_count already seen), progress_messages holds only
+    the messages that arrived after it.
+    """
     if not API_BASE_URL: return {"error": "Backend URL not configured"}
     url = f"{API_BASE_URL}/job-status/{job_id}"
-    logger.info(f"Getting job status for {job_id} from: {url}")
+    params = {"since": since} if since is not None else None
+    logger.debug("Getting job status for %s from: %s", job_id, url)
     try:
-        resp = requests.get(url, verify=False, timeout=60) # Added timeout
+        resp = _SESSION.get(url, params=params, verify=False, timeout=60) # Added timeout
         resp.raise_for_status()
-        return resp.json()
+        return _decode_json(resp)
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to get job status for {job_id}: {e}")
         return {"error": str(e), "status": "error"} # Include status for polling loops
@@ -257,6 +355,35 @@ def get_job_status(job_id):
         logger.error(f"Unexpected error getting job status: {e}")
         return {"error": f"Unexpected error: {str(e)}", "status": "error"}
 
+# --- JOB EVENT STREAM FUNCTION ---
+def stream_job_events(job_id, since=None):
+    """
+    Follow a job's Server-Sent Events stream, yielding each status snapshot
+    the backend pushes until the job finishes and the stream closes.
+    With since (a message_count already seen), each snapshot's
+    progress_messages holds only the messages new since the previous one.
+    Raises on connection or HTTP errors so callers can fall back to polling
+    get_job_status.
+    """
+    if not API_BASE_URL:
+        raise RuntimeError("Backend URL not configured")
+    url = f"{API_BASE_URL}/job-events/{job_id}"
+    params = {"since": since} if since is not None else None
+    logger.info("Opening job event stream for %s at: %s", job_id, url)
+    
+    # Read timeout comfortably above the backend's keep-alive interval
+    with _SESSION.get(url, params=params, stream=True, verify=False, timeout=(10, 60)) as resp:
+        resp.raise_for_status()
+        resp.encoding = "utf-8" # text/event-stream is always UTF-8
+        for line in resp.iter_lines(decode_unicode=True):
+            # Lines starting with ':' are keep-alive comments
+            if line and line.startswith("data:"):
+                data = line[len("data:"):]
+                yield orjson.loads(data) if orjson is not None else json.loads(data)
+    
+    logger.info("Job event stream for %s closed", job_id)
+# --- END JOB EVENT STREAM FUNCTION ---
+
 # --- NEW FUNCTION FOR JOB LOGS ---
 def get_job_logs(job_id, limit=100, since_id=None):
     """Get detailed logs for a specific job, optionally filtering by log ID."""
@@ -272,7 +399,7 @@ def get_job_logs(job_id, limit=100, since_id=None):
     logger.info(f"Getting job logs for {job_id} from: {url} with params: {params}")
     
     try:
-        resp = requests.get(url, params=params, verify=False, timeout=60)
+        resp = _SESSION.get(url, params=params, verify=False, timeout=60)
         resp.raise_for_status()
         return resp.json()
     except requests.exceptions.RequestException as e:
@@ -284,6 +411,18 @@ def get_job_logs(job_id, limit=100, since_id=None):
 # --- END NEW FUNCTION ---
 
 # --- DELETE DRAWING FUNCTION ---
+def _sanitize_drawing_name(drawing_name):
+    """
+    Apply a simpler but more aggressive sanitization:
+    1. Remove all non-alphanumeric characters
+    2. Keep underscores but replace spaces, periods, and hyphens with underscores
+    3. Keep numbers and letters
+    """
+    sanitized_name = drawing_name.strip()
+    sanitized_name = re.sub(r'[\s.-]', '_', sanitized_name)  # Replace spaces, dots, hyphens with underscore
+    sanitized_name = re.sub(r'[^a-zA-Z0-9_]', '', sanitized_name)  # Keep only alphanumeric and underscores
+    return sanitized_name
+
 def delete_drawing(drawing_name, user_id=None):
     """
     Request deletion of a specific drawing file from the backend.
@@ -296,13 +435,7 @@ def delete_drawing(drawing_name, user_id=None):
         logger.error("Cannot delete drawing: BACKEND_API_URL not configured.")
         return {"success": False, "error": "Backend URL not configured"}
 
-    # Apply a simpler but more aggressive sanitization:
-    # 1. Remove all non-alphanumeric characters
-    # 2. Keep underscores but replace spaces, periods, and hyphens with underscores
-    # 3. Keep numbers and letters
-    sanitized_name = drawing_name.strip()
-    sanitized_name = re.sub(r'[\s.-]', '_', sanitized_name)  # Replace spaces, dots, hyphens with underscore
-    sanitized_name = re.sub(r'[^a-zA-Z0-9_]', '', sanitized_name)  # Keep only alphanumeric and underscores
+    sanitized_name = _sanitize_drawing_name(drawing_name)
     
     logger.info(f"Sanitized drawing name from '{drawing_name}' to '{sanitized_name}'")
 
@@ -323,8 +456,8 @@ def delete_drawing(drawing_name, user_id=None):
     logger.info(f"Requesting deletion of drawing '{drawing_name}' (sanitized to '{sanitized_name}') via DELETE to: {url} with params: {params}")
 
     try:
-        # Use requests.delete method with params for user_id
-        resp = requests.delete(url, params=params, verify=False, timeout=60) 
+        # Use the shared session's delete method with params for user_id
+        resp = _SESSION.delete(url, params=params, verify=False, timeout=60) 
         response_text = resp.text 
         
         logger.info(f"Delete Response Status Code: {resp.status_code}")
@@ -365,6 +498,52 @@ def delete_drawing(drawing_name, user_id=None):
         return {"success": True, "message": f"Drawing deletion process completed with status: error occurred"}
 # --- END DELETE FUNCTION ---
 
+# --- BATCH DELETE FUNCTION ---
+def delete_drawings(drawing_names, user_id=None):
+    """
+    Delete several drawings with a single request to the backend.
+    
+    Args:
+        drawing_names (list): Names of the drawings to delete
+        user_id (str, optional): The user ID owning these drawings (isolates workspaces)
+    
+    Returns:
+        A list with one delete_drawing-style response per name, in order, or
+        None if the backend has no batch endpoint (callers then delete one by one).
+    """
+    if not API_BASE_URL:
+        logger.error("Cannot delete drawings: BACKEND_API_URL not configured.")
+        return [{"success": False, "error": "Backend URL not configured"} for _ in drawing_names]
+
+    sanitized_names = [_sanitize_drawing_name(name) for name in drawing_names]
+    url = f"{API_BASE_URL}/delete_drawings"
+    params = {'user_id': user_id} if user_id else {}
+    logger.info("Requesting batch deletion of %d drawings via POST to: %s", len(drawing_names), url)
+
+    try:
+        resp = _SESSION.post(url, params=params, json={"drawings": sanitized_names}, verify=False, timeout=120)
+        if resp.status_code in (404, 405):
+            logger.warning("Batch delete endpoint not available (status %d)", resp.status_code)
+            return None
+        resp.raise_for_status()
+        results = _decode_json(resp).get("results", {})
+    except Exception as e:
+        logger.error(f"Batch delete failed: {e}")
+        return [{"success": False, "error": str(e)} for _ in drawing_names]
+
+    responses = []
+    for name, sanitized_name in zip(drawing_names, sanitized_names):
+        result = results.get(sanitized_name, {"error": "No result returned"})
+        if result.get("success"):
+            responses.append({"success": True, "message": f"Drawing {name} deleted"})
+        elif result.get("status") == 404:
+            # Consider "not found" as success for UI purposes
+            responses.append({"success": True, "message": f"Drawing {name} not found or already deleted"})
+        else:
+            responses.append({"success": False, "error": result.get("error", "Unknown error")})
+    return responses
+# --- END BATCH DELETE FUNCTION ---
+
 # --- CLEAR CACHE FUNCTION ---
 def clear_cache(user_id=None):
     """
@@ -391,10 +570,10 @@ def clear_cache(user_id=None):
     logger.info(f"Requesting cache clearing via: {url} with params: {params}")
     
     try:
-        resp = requests.delete(url, params=params, verify=False, timeout=60)
+        resp = _SESSION.delete(url, params=params, verify=False, timeout=60)
         resp.raise_for_status()
         
-        return resp.json()
+        return _decode_json(resp)
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to clear cache: {e}")
         return {"success": False, "error": str(e)}
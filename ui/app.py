@@ -3,30 +3,114 @@
 # REVISED: Ensured drawings are always fetched on initial load
 
 import streamlit as st
+import asyncio
+import threading
 import time
 import logging
+import functools
 import sys
 import os
 import re
 import json
+try:
+    import orjson # Faster parsing of large result strings, if installed
+except ImportError:
+    orjson = None
 from api_client import (
     health_check,
     get_drawings,
     delete_drawing,
+    delete_drawings,
     start_analysis,
     get_job_status,
+    get_ui_state,
+    stream_job_events,
     upload_drawing,
-    clear_cache
+    clear_cache,
+    create_session,
+    use_session,
+    seconds_since_last_success
 )
 
 # --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - UI - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# This script runs again on every rerun; only configure the root logger the
+# first time so no handler objects are built per rerun
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - UI - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
 logger = logging.getLogger(__name__)
 
+# --- Shared HTTP Session ---
+@st.cache_resource
+def http_session():
+    """One pooled HTTP session shared by every session and rerun of this server"""
+    return create_session()
+
+use_session(http_session())
+
+# --- Job Status Polling Backoff ---
+# Seconds between get_job_status polls: starts short, grows while the job
+# reports nothing new and snaps back as soon as it moves again
+POLL_INTERVAL_MIN = 1.0
+POLL_INTERVAL_MAX = 5.0
+POLL_BACKOFF = 1.5
+RECENT_PROGRESS_MESSAGES = 20  # Progress messages kept per job for display
+
+def job_progress_key(job):
+    """The parts of a job snapshot that count as progress"""
+    if not job:
+        return None
+    # message_count keeps growing after the backend starts dropping old messages
+    return (job.get('status'), job.get('progress'), job.get('phase'), job.get('message_count'))
+
+def next_poll_interval(interval, previous_job, job):
+    """Back off while the job is unchanged, otherwise poll at the minimum interval again"""
+    if job_progress_key(previous_job) != job_progress_key(job):
+        return POLL_INTERVAL_MIN
+    return min(interval * POLL_BACKOFF, POLL_INTERVAL_MAX)
+
+# --- Finished Job Status Cache ---
+# A job in one of these states never changes again
+TERMINAL_JOB_STATUSES = ("completed", "failed", "stopped")
+
+def remember_job_status(job_id, job):
+    """Keep a job's status once it is final, so it is never fetched again"""
+    if job and job.get('status') in TERMINAL_JOB_STATUSES:
+        st.session_state.job_status_cache[job_id] = job
+
+def cached_job_status(job_id, previous_job=None):
+    """
+    get_job_status, answered from session state for jobs already known to be
+    finished. Given the job's previous snapshot, only messages newer than it
+    are fetched and added to its recent ones.
+    """
+    job = st.session_state.job_status_cache.get(job_id)
+    if job is None:
+        since = None
+        if previous_job and previous_job.get('id') == job_id:
+            since = previous_job.get('message_count')
+        job = get_job_status(job_id, since=since)
+        if since is not None and 'message_count' in job:
+            job['progress_messages'] = (previous_job.get('progress_messages', [])
+                                        + job.get('progress_messages', []))[-RECENT_PROGRESS_MESSAGES:]
+        remember_job_status(job_id, job)
+    return job
+
+# --- Analysis Result Cache ---
+def analysis_cache_key(query, drawings, user_id=None):
+    """Identifies an analysis by workspace, (stripped) question and drawing set, whatever order the drawings were picked in"""
+    return (user_id, query, tuple(sorted(drawings)))
+
+def forget_drawing_results(drawing_names):
+    """Drop remembered results that used any of these drawings (deleted, or replaced by a new upload)"""
+    drawing_names = set(drawing_names)
+    cache = st.session_state.analysis_result_cache
+    for key in [key for key in cache if drawing_names.intersection(key[2])]:
+        del cache[key]
+
 # --- Check for user_id parameter from Auth0 ---
 def check_user_parameter():
     """
@@ -66,11 +150,16 @@ def check_user_parameter():
                 logger.info(f"Cleared selected drawings for user workspace: {user_id}")
             if 'analysis_results' in st.session_state:
                 st.session_state.analysis_results = None
+                st.session_state.analysis_results_text = None
                 logger.info(f"Cleared analysis results for user workspace: {user_id}")
+            if 'analysis_result_cache' in st.session_state:
+                st.session_state.analysis_result_cache.clear()
+                st.session_state.job_status_cache.clear()
+                st.session_state.current_job_key = None
             
             return True
         elif user_id and user_id == current_user_id:
-            logger.debug(f"Same user continued session: {user_id}")
+            logger.debug("Same user continued session: %s", user_id)
             return False
         return False
     except Exception as e:
@@ -99,25 +188,39 @@ def user_clear_cache():
         return {"success": False, "error": str(e)}
 
 # --- Session State Initialization ---
+# Session state defaults. Mutable defaults are given as factories (list, dict)
+# so every session gets fresh objects instead of sharing these ones
+SESSION_DEFAULTS = {
+    'backend_healthy': False,
+    'drawings': list,
+    'drawings_version': None,  # Backend fingerprint of the drawings list held above
+    'selected_drawings': list,
+    'query': '',
+    'use_cache': True,
+    'current_job_id': None,
+    'job_status': None,
+    'analysis_results': None,
+    'analysis_results_text': None,  # JSON text of analysis_results, built once
+    'last_status_check': 0,
+    'status_poll_interval': POLL_INTERVAL_MIN,
+    'upload_status': dict,  # Track upload status
+    'show_directions': False,  # Track directions visibility
+    'user_id': None,  # Store the Auth0 user ID
+    'job_listeners': dict,  # Event stream listeners by job ID
+    'job_status_cache': dict,  # Final status of finished jobs by job ID
+    'drawing_table_version': 0,  # Bumped to give the drawing table a fresh widget
+    'analysis_result_cache': dict,  # Shown results by analysis_cache_key
+    'current_job_key': None,  # analysis_cache_key of the running job
+}
+
 def init_state():
-    defaults = {
-        'backend_healthy': False,
-        'drawings': [],
-        'drawings_last_updated': 0,
-        'selected_drawings': [],
-        'query': '',
-        'use_cache': True,
-        'current_job_id': None,
-        'job_status': None,
-        'analysis_results': None,
-        'last_status_check': 0,
-        'upload_status': {},  # Track upload status
-        'show_directions': False,  # Track directions visibility
-        'user_id': None,  # Store the Auth0 user ID
-    }
-    for k, v in defaults.items():
+    # Defaults only need writing once per session; later reruns stop here
+    if st.session_state.get('_init_done'):
+        return
+    for k, v in SESSION_DEFAULTS.items():
         if k not in st.session_state:
-            st.session_state[k] = v
+            st.session_state[k] = v() if callable(v) else v
+    st.session_state._init_done = True
 
 init_state()
 
@@ -164,8 +267,43 @@ def get_directions_content():
     5. Verify results with the actual drawings.
     """
 
+# --- Cached Backend Health Check ---
+# Skip the health probe when any API call succeeded within this many seconds
+RECENT_SUCCESS_SECONDS = 10
+
+@st.cache_data(ttl=15, show_spinner=False)
+def cached_health_check():
+    """Backend health, cached for 15 seconds so reruns don't each cost a round-trip"""
+    return health_check()
+
+# --- Cached Drawings Fetch ---
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_drawings(user_id=None):
+    """Sorted drawings list for a user, cached for 30 seconds per user_id"""
+    # Failures raise, so an error is never cached as an empty list
+    return sorted(get_drawings(user_id, raise_errors=True))
+
+# --- Concurrent Initial Fetch ---
+async def warm_backend_caches(user_id=None):
+    """
+    Fetch backend health and the drawings list at the same time on worker
+    threads. Both land in their st.cache_data caches, so the sequential
+    checks in main() that follow are served from the cache instead of paying
+    two round-trips in series. Failures are left for those checks to report.
+    """
+    await asyncio.gather(
+        asyncio.to_thread(cached_health_check),
+        asyncio.to_thread(cached_drawings, user_id),
+        return_exceptions=True
+    )
+
 # --- Helper to Refresh Drawings ---
-def refresh_drawings():
+def refresh_drawings(force=False):
+    """
+    Load the drawings list into session state.
+    force=True drops the cached copy first so the backend is asked again;
+    use it whenever the list is known to have changed (upload, delete, manual refresh).
+    """
     try:
         # Check if we should skip this refresh operation (one-time flag for fresh workspace)
         if st.session_state.get("skip_next_refresh", False):
@@ -184,20 +322,146 @@ def refresh_drawings():
         user_id = st.session_state.get("user_id")
         
         # Normal operation - fetch drawings from API with user_id
-        st.session_state.drawings = get_drawings(user_id)
-        st.session_state.drawings_last_updated = time.time()
+        state = None
+        drawings = None  # Stays None when the backend reports the list unchanged
+        if force:
+            cached_drawings.clear()
+            # Send the version of the list we hold, so an unchanged list
+            # isn't sent back again
+            held_version = st.session_state.drawings_version if st.session_state.drawings else None
+            state = get_ui_state(drawings_version=held_version, user_id=user_id)
+        if state is not None:
+            if "drawings" in state:
+                drawings = sorted(state["drawings"])
+            version = state.get("drawings_version")
+        else:
+            # Served from the cache unless it has expired or was cleared
+            drawings = cached_drawings(user_id)
+            version = None
+        
+        # Only replace the stored list (and re-check the selection) when it
+        # actually changed
+        if drawings is not None and drawings != st.session_state.drawings:
+            st.session_state.drawings = drawings
+            
+            # Drop selections that no longer exist so analysis never asks the
+            # backend for drawings it doesn't have
+            available = set(drawings)
+            st.session_state.selected_drawings = [d for d in st.session_state.selected_drawings if d in available]
+        st.session_state.drawings_version = version
         
         if user_id:
-            logger.info(f"Refreshed drawings list for user {user_id}: {len(st.session_state.drawings)} items")
+            logger.info("Refreshed drawings list for user %s: %d items", user_id, len(st.session_state.drawings))
         else:
-            logger.info(f"Refreshed drawings list (global workspace): {len(st.session_state.drawings)} items")
+            logger.info("Refreshed drawings list (global workspace): %d items", len(st.session_state.drawings))
             
         return True
     except Exception as e:
-        logger.error(f"Failed to refresh drawings: {e}")
+        # st.session_state.drawings still holds the last list fetched successfully,
+        # so the page keeps showing it rather than going empty
+        logger.error(f"Failed to refresh drawings, keeping the last good list: {e}")
         return False
 
+# --- Helper to Delete Drawings Concurrently ---
+async def delete_drawings_concurrently(drawings, user_id=None):
+    """
+    Run delete_drawing for every drawing on worker threads at the same time.
+    Each call is blocking I/O, so the round-trips overlap instead of adding up.
+    Returns one response (or the raised exception) per drawing, in order.
+    """
+    return await asyncio.gather(
+        *(asyncio.to_thread(delete_drawing, drawing, user_id) for drawing in drawings),
+        return_exceptions=True
+    )
+
+# --- Progress Message Helpers ---
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+def strip_timestamp(message):
+    """Drop the "<timestamp> - " prefix the backend puts on progress messages"""
+    _, sep, text = message.partition(" - ")
+    return text if sep else message
+
+@functools.lru_cache(maxsize=512)
+def clean_progress_message(message):
+    """Message without its timestamp or HTML tags; memoized since the same
+    few messages are redrawn on every status tick"""
+    return HTML_TAG_RE.sub('', strip_timestamp(message))
+
+# --- Upload Progress Fragment ---
+@st.fragment(run_every=1)
+def upload_progress_fragment(file_key, file_name):
+    """
+    Show processing progress for an uploaded drawing. Only this panel reruns
+    on each tick. Status comes from the job's event stream, like analysis
+    jobs; get_job_status is polled with the shared backoff only when the
+    stream is unavailable. Once the job completes or fails, one full rerun
+    hands over to the upload component.
+    """
+    status_info = st.session_state.upload_status[file_key]
+    job_id = status_info['job_id']
+    
+    listener = job_listener(job_id)
+    
+    job = listener["job"]
+    if listener["error"] or job is None:
+        # Stream unavailable (e.g. older backend) or not delivering yet - poll instead
+        job = status_info.get('last_job')
+        if job is None or time.time() - status_info.get('last_poll', 0) >= status_info.get('poll_interval', POLL_INTERVAL_MIN):
+            fresh_job = cached_job_status(job_id, job)
+            status_info['poll_interval'] = next_poll_interval(
+                status_info.get('poll_interval', POLL_INTERVAL_MIN), job, fresh_job
+            )
+            status_info['last_poll'] = time.time()
+            job = fresh_job
+    status_info['last_job'] = job
+    
+    # Show status indicator
+    with st.status(f"Processing {file_name}...", expanded=True) as status:
+        if not job:
+            st.error("Could not retrieve job status")
+            return
+        
+        # Extract status information
+        percent = job.get("progress", 0)
+        backend_status = job.get("status", "unknown")
+        current_phase = job.get("phase", "")
+        messages = job.get("progress_messages", [])
+        
+        # Show status details
+        status.write(f"**Phase:** {current_phase}")
+        st.progress(int(percent), text=f"Progress: {percent}%")
+        
+        # Show recent messages
+        if messages:
+            st.write("Recent updates:")
+            for msg in messages[-3:]:
+                st.info(strip_timestamp(msg))
+    
+    # Check for completion - the full rerun picks up the new drawings list
+    if backend_status in ("completed", "failed"):
+        st.session_state.job_listeners.pop(job_id, None)
+    if backend_status == "completed":
+        # Only drop the cached list here; it is fetched again when the
+        # rerun renders it
+        cached_drawings.clear()
+        result_info = job.get("result", {})
+        status_info['status'] = 'completed'
+        status_info['drawing_name'] = result_info.get('drawing_name', file_name)
+        # A re-uploaded sheet keeps its name; earlier answers about it are stale
+        forget_drawing_results([status_info['drawing_name']])
+        status_info['just_completed'] = True
+        st.rerun()
+    elif backend_status == "failed":
+        status_info['status'] = 'failed'
+        status_info['error'] = job.get("error", "Unknown error")
+        st.rerun()
+
 # --- Integrated Upload Drawing Component ---
+def retry_upload(file_key):
+    """Put a failed upload back to 'new' so the Process button shows straight away"""
+    st.session_state.upload_status[file_key] = {'status': 'new', 'job_id': None}
+
 def integrated_upload_drawing():
     """Simplified file uploader integrated directly into app.py"""
     st.header("Upload Drawing")
@@ -222,14 +486,15 @@ def integrated_upload_drawing():
         if status_info['status'] == 'new':
             if st.button("Process Drawing"):
                 try:
-                    # Get file bytes directly
-                    file_bytes = uploaded_file.getbuffer()
+                    # Send the uploaded file object itself so its bytes are
+                    # streamed as the request body without another copy
+                    uploaded_file.seek(0)
                     
                     # Get user_id from session state
                     user_id = st.session_state.get("user_id")
                     
                     # Upload to API with user_id
-                    resp = upload_drawing(file_bytes, uploaded_file.name, user_id)
+                    resp = upload_drawing(uploaded_file, uploaded_file.name, user_id)
                     job_id = resp.get("job_id")
                     
                     if job_id:
@@ -242,68 +507,17 @@ def integrated_upload_drawing():
                 except Exception as e:
                     st.error(f"Error during upload: {e}")
         
-        # Handle processing uploads
+        # Handle processing uploads - polled inside their own fragment
         if status_info['status'] == 'processing' and status_info['job_id']:
-            job_id = status_info['job_id']
-            
-            # Show status indicator
-            with st.status(f"Processing {uploaded_file.name}...", expanded=True) as status:
-                # Get job status
-                job = get_job_status(job_id)
-                
-                if not job:
-                    st.error("Could not retrieve job status")
-                    return False
-                
-                # Extract status information
-                percent = job.get("progress", 0)
-                backend_status = job.get("status", "unknown")
-                current_phase = job.get("phase", "")
-                messages = job.get("progress_messages", [])
-                
-                # Show status details
-                status.write(f"**Phase:** {current_phase}")
-                st.progress(int(percent), text=f"Progress: {percent}%")
-                
-                # Show recent messages
-                if messages:
-                    st.write("Recent updates:")
-                    for msg in messages[-3:]:
-                        if " - " in msg:
-                            msg = msg.split(" - ", 1)[1]  # Remove timestamp
-                        st.info(msg)
-                
-                # Check for completion
-                if backend_status == "completed":
-                    result_info = job.get("result", {})
-                    drawing_name = result_info.get('drawing_name', uploaded_file.name)
-                    
-                    # Update status
-                    st.session_state.upload_status[file_key]['status'] = 'completed'
-                    
-                    # Critical fix: Force drawings refresh on completion
-                    refresh_drawings()
-                    st.session_state["refresh_drawings_needed"] = True
-                    
-                    # Show completion message
-                    status.update(label="✅ Processing Complete", state="complete")
-                    st.success(f"✅ UPLOAD COMPLETE: {drawing_name} has been successfully processed!")
-                    st.info("The drawing is now available for analysis.")
-                    
-                    return True
-                
-                elif backend_status == "failed":
-                    # Handle failure
-                    error_msg = job.get("error", "Unknown error")
-                    st.session_state.upload_status[file_key]['status'] = 'failed'
-                    status.update(label="❌ Processing Failed", state="error")
-                    st.error(f"Error: {error_msg}")
-                    return False
-                
-                # Auto-refresh for ongoing uploads
-                if percent < 100 and backend_status != "completed" and backend_status != "failed":
-                    time.sleep(2)  # Brief pause
-                    st.rerun()  # This rerun is needed for the polling loop
+            upload_progress_fragment(file_key, uploaded_file.name)
+        
+        # Upload finished on the previous fragment tick - announce it once
+        # and let main() refresh the drawings list
+        elif status_info['status'] == 'completed' and status_info.pop('just_completed', False):
+            drawing_name = status_info.get('drawing_name', uploaded_file.name)
+            st.success(f"✅ UPLOAD COMPLETE: {drawing_name} has been successfully processed!")
+            st.info("The drawing is now available for analysis.")
+            return True
         
         # Show status for completed uploads
         elif status_info['status'] == 'completed':
@@ -313,44 +527,101 @@ def integrated_upload_drawing():
         # Show status for failed uploads
         elif status_info['status'] == 'failed':
             st.error(f"❌ Previous upload of {uploaded_file.name} failed")
-            if st.button("Try Again"):
-                st.session_state.upload_status[file_key]['status'] = 'new'
-                # The button click will naturally trigger a rerun
+            if status_info.get('error'):
+                st.caption(f"Error: {status_info['error']}")
+            st.button("Try Again", on_click=retry_upload, args=(file_key,))
     
     return False
 
 # --- Integrated Drawing List Component ---
+DRAWINGS_PAGE_SIZE = 25  # Rows sent to the browser per page of the drawing table
+
+def on_select_all_change():
+    """Select every drawing when 'Select All' is ticked; start again from an empty selection when unticked"""
+    if st.session_state.select_all:
+        st.session_state.selected_drawings = list(st.session_state.drawings)
+    else:
+        st.session_state.selected_drawings = []
+    st.session_state.drawing_table_version += 1
+
+def on_drawing_table_change():
+    """Apply the rows ticked or unticked in the drawing table straight to selected_drawings"""
+    rows = st.session_state.drawing_table_rows  # drawings in the order the table showed them
+    selected = set(st.session_state.selected_drawings)
+    for row, change in st.session_state[st.session_state.drawing_table_key]["edited_rows"].items():
+        row = int(row)
+        if "Select" not in change or row >= len(rows):
+            continue
+        if change["Select"]:
+            selected.add(rows[row])
+        else:
+            selected.discard(rows[row])
+    st.session_state.selected_drawings = [d for d in st.session_state.drawings if d in selected]
+    # edited_rows is cumulative for the life of the widget and is tied to row
+    # positions, not drawings; start a new widget so each change is applied once
+    st.session_state.drawing_table_version += 1
+
 def integrated_drawing_list(drawings):
-    """Simplified drawing list integrated directly into app.py"""
+    """
+    Simplified drawing list integrated directly into app.py.
+    Selection changes are written to st.session_state.selected_drawings by
+    the widget callbacks, before the rerun starts.
+    """
     st.subheader("Available Drawings")
     
     # No drawings case
     if not drawings:
         st.info("No drawings available. Upload a drawing to get started.")
-        return []
+        return
     
-    # Select All option
-    select_all = st.checkbox("Select All Drawings", key="select_all")
-    selected = []
-    
-    # Show drawings with selection
+    # Select All option - also picks up drawings added since it was ticked
+    select_all = st.checkbox("Select All Drawings", key="select_all", on_change=on_select_all_change)
     if select_all:
-        for drawing in drawings:
-            st.checkbox(drawing, value=True, key=f"cb_{drawing}", disabled=True)
-        selected = drawings.copy()
-    else:
-        for drawing in drawings:
-            if st.checkbox(drawing, key=f"cb_{drawing}"):
-                selected.append(drawing)
+        st.session_state.selected_drawings = list(drawings)
+    
+    # Show drawings with selection as a single table widget instead of one
+    # checkbox per drawing, so the browser gets one element regardless of N
+    # (pandas is imported here so first paint doesn't wait on it)
+    import pandas as pd
+    selected_set = set(st.session_state.selected_drawings)
+    
+    # Only one page of rows is sent per run; selection is kept by name, so it
+    # survives paging
+    page_count = (len(drawings) - 1) // DRAWINGS_PAGE_SIZE + 1
+    page = 1
+    if page_count > 1:
+        if st.session_state.get("drawings_page", 1) > page_count:
+            st.session_state.drawings_page = page_count  # List shrank under the current page
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="drawings_page")
+    rows = drawings[(page - 1) * DRAWINGS_PAGE_SIZE:page * DRAWINGS_PAGE_SIZE]
+    
+    table = pd.DataFrame({
+        "Select": [d in selected_set for d in rows],
+        "Drawing": rows,
+    })
+    st.session_state.drawing_table_rows = rows
+    # Keyed per page and per applied change, so edits made on one page (or
+    # already applied) are never replayed onto other rows
+    st.session_state.drawing_table_key = f"drawing_table_{page}_{st.session_state.drawing_table_version}"
+    st.data_editor(
+        table,
+        key=st.session_state.drawing_table_key,
+        hide_index=True,
+        use_container_width=True,
+        disabled=True if select_all else ["Drawing"],
+        column_config={"Select": st.column_config.CheckboxColumn("Select", default=False)},
+        on_change=on_drawing_table_change
+    )
     
     # Display count
-    st.caption(f"Showing {len(drawings)} drawing(s)")
+    if page_count > 1:
+        st.caption(f"Showing {len(rows)} of {len(drawings)} drawing(s), {len(selected_set)} selected")
+    else:
+        st.caption(f"Showing {len(drawings)} drawing(s)")
     
     # Instructions if none selected
-    if not selected:
+    if not selected_set:
         st.caption("Select drawings to analyze or delete")
-    
-    return selected
 
 # --- Helper function to convert markdown to HTML ---
 def markdown_to_html(markdown_text):
@@ -415,6 +686,35 @@ def markdown_to_html(markdown_text):
 # MINIMALLY MODIFIED VERSION - Only fixing the download functionality
 
 # The key change is to preserve the result in session state and use ONE consistent key for download buttons
+# Results whose JSON is larger than this are offered as a download instead of
+# being drawn as an st.json tree in the browser
+LARGE_RESULT_BYTES = 64 * 1024
+
+def results_json_text(result_obj):
+    """Pretty JSON for a result, reusing the copy built when the results were stored"""
+    if result_obj is st.session_state.get('analysis_results') and st.session_state.get('analysis_results_text'):
+        return st.session_state.analysis_results_text
+    return json.dumps(result_obj, indent=2)
+
+def render_result_json(result_obj, offer_download=True):
+    """st.json for normal results; large ones get a size note and a JSON download"""
+    json_str = results_json_text(result_obj)
+    if len(json_str) <= LARGE_RESULT_BYTES:
+        # st.json passes a string through as-is, so the stored text isn't
+        # serialized again on every rerun
+        st.json(json_str)
+        return
+    st.caption(f"Result is {len(json_str) // 1024} KB - too large to display here.")
+    if offer_download:
+        st.download_button(
+            label="Download JSON",
+            data=json_str,
+            file_name="analysis_results.json",
+            mime="application/json",
+            on_click="ignore",  # Download happens in the browser; no rerun
+            key="download_json"
+        )
+
 def integrated_results_pane(result_text):
     """Improved results display with better formatting and error handling"""
     try:
@@ -451,26 +751,29 @@ def integrated_results_pane(result_text):
                             data=html_content,
                             file_name="analysis_results.html",
                             mime="text/html",
+                            on_click="ignore",
                             key="download_content"  # CONSISTENT KEY
                         )
                         
                         # Technical information in an expandable section - UNCHANGED
                         with st.expander("Technical Information", expanded=False):
-                            st.json(result_obj)
+                            render_result_json(result_obj)
                         
                         return
                     
                     # If no analysis field but it's still a dict, just display content - UNCHANGED
                     st.subheader("Analysis Results")
-                    st.json(result_obj)
+                    render_result_json(result_obj, offer_download=False)  # Copy Results below covers it
                     
                     # Add a download button - USING CONSISTENT KEY
-                    json_str = json.dumps(result_obj, indent=2)
+                    # (text serialized once when the results were stored)
+                    json_str = results_json_text(result_obj)
                     st.download_button(
                         label="Copy Results",
                         data=json_str,
                         file_name="analysis_results.json",
                         mime="application/json",
+                        on_click="ignore",
                         key="download_content"  # CONSISTENT KEY
                     )
                     
@@ -480,7 +783,7 @@ def integrated_results_pane(result_text):
                 elif isinstance(result_text, str):
                     try:
                         # Try to parse as JSON first - BEHAVIOR UNCHANGED
-                        result_obj = json.loads(result_text)
+                        result_obj = orjson.loads(result_text) if orjson is not None else json.loads(result_text)
                         if isinstance(result_obj, dict) and 'analysis' in result_obj:
                             analysis_text = result_obj['analysis']
                             st.markdown(analysis_text)
@@ -492,6 +795,7 @@ def integrated_results_pane(result_text):
                                 data=html_content,
                                 file_name="analysis_results.html",
                                 mime="text/html",
+                                on_click="ignore",
                                 key="download_content"  # CONSISTENT KEY
                             )
                         else:
@@ -504,6 +808,7 @@ def integrated_results_pane(result_text):
                                 data=html_content,
                                 file_name="analysis_results.html",
                                 mime="text/html",
+                                on_click="ignore",
                                 key="download_content"  # CONSISTENT KEY
                             )
                     except json.JSONDecodeError:
@@ -517,6 +822,7 @@ def integrated_results_pane(result_text):
                             data=html_content,
                             file_name="analysis_results.html",
                             mime="text/html",
+                            on_click="ignore",
                             key="download_content"  # CONSISTENT KEY
                         )
         else:
@@ -529,6 +835,287 @@ def integrated_results_pane(result_text):
         # Only show fallback for real exceptions, not empty results - UNCHANGED
         st.info("Results will appear here after analysis completes.")
 
+# --- Job Event Listener ---
+# A listener whose job no page has read for this long stops following it
+# the next time the backend closes its stream
+LISTENER_IDLE_SECONDS = 30
+
+def start_job_listener(job_id):
+    """
+    Follow a job's event stream on a background thread.
+    Returns a dict the thread keeps updated: 'job' holds the latest snapshot
+    pushed by the backend, 'done' is set once the stream ends, and 'error'
+    is set if the stream could not be followed (callers then poll instead).
+    The backend closes streams after a fixed lifetime; the listener
+    reconnects from the last message it saw while the job is still running
+    and a page has read 'job' (stamping 'read_at') recently.
+    """
+    listener = {"job": None, "done": False, "error": None, "read_at": time.time()}
+    
+    def listen():
+        try:
+            # Events carry only new progress messages; keep the recent ones
+            # the status panels show
+            recent = []
+            since = 0
+            while True:
+                for job in stream_job_events(job_id, since=since):
+                    since = job.get("message_count", since)
+                    recent = (recent + job.get("progress_messages", []))[-RECENT_PROGRESS_MESSAGES:]
+                    job["progress_messages"] = recent
+                    listener["job"] = job
+                
+                job = listener["job"]
+                if (job is None or job.get("status") in TERMINAL_JOB_STATUSES
+                        or time.time() - listener["read_at"] > LISTENER_IDLE_SECONDS):
+                    return
+        except Exception as e:
+            logger.warning(f"Job event stream for {job_id} failed, falling back to polling: {e}")
+            listener["error"] = str(e)
+        finally:
+            listener["done"] = True
+    
+    threading.Thread(target=listen, daemon=True).start()
+    return listener
+
+def job_listener(job_id):
+    """
+    The session's listener for a job, started (or restarted after it went
+    idle) as needed. Reading it through here marks it as still in use.
+    """
+    listener = st.session_state.job_listeners.get(job_id)
+    if listener is not None and listener["done"] and not listener["error"]:
+        job = listener["job"]
+        if job is None or job.get("status") not in TERMINAL_JOB_STATUSES:
+            listener = None  # Stopped following an unfinished job - follow it again
+    if listener is None:
+        listener = start_job_listener(job_id)
+        st.session_state.job_listeners[job_id] = listener
+    listener["read_at"] = time.time()
+    return listener
+
+# --- Analysis Job Status Fragment ---
+@st.fragment(run_every=1)
+def job_status_fragment():
+    """
+    Display the status of the running analysis job.
+    Status is pushed by the backend over an event stream and picked up from
+    the listener on each fragment tick, so only this panel reruns and no
+    request is made per tick. Polls get_job_status only when the stream is
+    unavailable, backing off from 1 to 5 seconds while the job is unchanged.
+    """
+    job_id = st.session_state.current_job_id
+    if not job_id:
+        return
+    
+    try:
+        listener = job_listener(job_id)
+        
+        job = listener["job"]
+        if listener["error"] or job is None:
+            # Stream unavailable or not delivering yet - poll job status instead
+            previous_job = st.session_state.job_status
+            job = previous_job
+            if job is None or time.time() - st.session_state.last_status_check >= st.session_state.status_poll_interval:
+                job = cached_job_status(job_id, previous_job)
+                st.session_state.last_status_check = time.time()
+                st.session_state.status_poll_interval = next_poll_interval(
+                    st.session_state.status_poll_interval, previous_job, job
+                )
+        
+        if job is None:
+            st.info("Waiting for job status...")
+            return
+        st.session_state.job_status = job
+        remember_job_status(job_id, job)
+
+        phase = job.get('phase') or ''
+        prog = job.get('progress', 0)
+        
+        # Status display in a bordered container with better spacing
+        with st.container(border=True):
+            # Status indicator
+            st.markdown(f"**Status:**")
+            st.markdown(f"### {phase}")
+            
+            # Progress indicator
+            st.progress(prog / 100, text=f"Progress: {prog}%")
+            
+            # Progress complete indicator - the status field is authoritative,
+            # progress and phase text only cover jobs that don't set it
+            if job.get('status') == 'completed' or prog >= 100 or 'complete' in phase.lower():
+                st.success("✅ Analysis complete! Click 'Show Results' to view.")
+        
+            # Recent Updates section
+            st.markdown("**Recent Updates:**")
+            logs = job.get('progress_messages', [])
+            if logs:
+                for log in logs[-3:]:
+                    # Remove HTML tags and timestamps if present
+                    st.info(clean_progress_message(log))
+    except Exception as e:
+        st.error(f"Error updating job status: {str(e)}")
+
+# --- Results Column Fragment ---
+@st.fragment
+def results_fragment():
+    """
+    Right-hand results column. Interactions inside it (download button,
+    technical information expander) rerun only this fragment instead of
+    the whole page; state changes from elsewhere still reach it on the
+    next full rerun.
+    """
+    # Show appropriate content based on analysis state
+    if st.session_state.current_job_id:
+        # Show "analyzing" message while job is running
+        st.info("Analysis in progress. Results will appear here when complete.")
+    elif st.session_state.analysis_results is not None:
+        # Show results using improved display function
+        integrated_results_pane(st.session_state.analysis_results)
+    else:
+        # Default state
+        st.info("Results will appear here after analysis completes.")
+
+# --- Button Callbacks ---
+# Run before the rerun starts, so the page is drawn once with the new state
+def toggle_directions():
+    st.session_state.show_directions = not st.session_state.show_directions
+
+def close_directions():
+    st.session_state.show_directions = False
+
+def force_refresh_drawings():
+    st.session_state["skip_next_refresh"] = False  # Ensure skip flag is off
+    st.session_state["drawings_refresh_failed"] = not refresh_drawings(force=True)
+
+def clear_results():
+    st.session_state.analysis_results = None
+    st.session_state.analysis_results_text = None
+
+# --- Page Styles ---
+# Page-wide CSS, built once at import and sent in a single element per run
+# (the sidebar upload container keeps its own block: its nth-child selector
+# depends on that element's position)
+APP_CSS = """
+<style>
+/* Add dark background with gradient like the homepage */
+body {
+    background-color: #0E1117;
+    background-image: linear-gradient(to bottom right, #0E1117, #1a1f2c);
+}
+
+/* Blueprint grid background overlay - matches homepage exactly */
+body:after {
+    content: '';
+    position: fixed;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background-image: 
+        linear-gradient(rgba(100, 181, 246, 0.03) 1px, transparent 1px),
+        linear-gradient(90deg, rgba(100, 181, 246, 0.03) 1px, transparent 1px);
+    background-size: 20px 20px;
+    pointer-events: none;
+    z-index: -1;
+}
+
+/* Make necessary containers transparent to show background */
+.stApp, section, [data-testid="stHeader"], [data-testid="stToolbar"],
+[data-testid="stDecoration"], [data-testid="stAppViewContainer"] {
+    background-color: transparent !important;
+}
+
+/* Make text more readable on dark background */
+.stMarkdown, .stText, caption, label, span, p {
+    color: #E0E0E0 !important;
+}
+
+/* Ensure headers are visible on dark background */
+h1, h2, h3, h4 {
+    color: white !important;
+}
+
+/* Add blueprint corner accents to containers */
+.stContainer:before, 
+[data-testid="column"]:first-child [data-testid="stVerticalBlock"]:before,
+[data-testid="stSidebar"] [data-testid="stVerticalBlock"] > div:nth-child(3):before {
+    content: '';
+    position: absolute;
+    top: 0;
+    right: 0;
+    width: 80px;
+    height: 80px;
+    background-image: 
+        linear-gradient(rgba(100, 181, 246, 0.07) 1px, transparent 1px),
+        linear-gradient(90deg, rgba(100, 181, 246, 0.07) 1px, transparent 1px);
+    background-size: 10px 10px;
+    opacity: 0.7;
+    border-radius: 0 10px 0 20px;
+    pointer-events: none;
+    z-index: 0;
+}
+
+/* Make ALL buttons green */
+.stButton button {
+    background-color: #4CAF50 !important;
+    color: white !important;
+    border: none !important;
+}
+
+/* Original styles preserved */
+.big-title {
+    font-size: 3rem !important;
+    margin-top: -1.5rem !important;
+    margin-bottom: 0.5rem !important;
+}
+.subtitle {
+    font-size: 1.2rem !important;
+    margin-top: -0.5rem !important;
+    margin-bottom: 1.5rem !important;
+}
+
+/* Style the status container for better appearance */
+[data-testid="stVerticalBlock"] > div > [data-testid="stContainer"] {
+    padding: 1rem;
+}
+
+/* Custom styling for directions panel */
+.directions-panel {
+    background-color: #1E1E1E;
+    color: white;
+    padding: 20px;
+    border-radius: 5px;
+    margin-bottom: 20px;
+}
+.directions-panel h1, .directions-panel h2, .directions-panel h3 {
+    color: white;
+}
+
+/* Show user ID indicator in top right */
+.user-indicator {
+    position: absolute;
+    top: 5px;
+    right: 15px;
+    font-size: 0.8rem;
+    color: #888;
+    padding: 2px 8px;
+    border-radius: 3px;
+    background-color: #f0f0f0;
+}
+
+/* Style for the left column container */
+[data-testid="column"]:first-child [data-testid="stVerticalBlock"] {
+    background: linear-gradient(135deg, rgba(30, 30, 30, 0.8), rgba(20, 30, 45, 0.8)) !important;
+    padding: 25px !important;
+    border-radius: 10px !important;
+    border: 1px solid rgba(100, 181, 246, 0.1) !important;
+    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2) !important;
+    margin-top: 5px !important;
+}
+</style>
+"""
+
 # --- Main Application ---
 def main():
     st.set_page_config(page_title="Sanctus Videre 1.0", layout="wide")
@@ -537,115 +1124,7 @@ def main():
     check_user_parameter()
     
     # Add custom CSS to make the title more prominent and add the blueprint grid background
-    st.markdown("""
-    <style>
-    /* Add dark background with gradient like the homepage */
-    body {
-        background-color: #0E1117;
-        background-image: linear-gradient(to bottom right, #0E1117, #1a1f2c);
-    }
-    
-    /* Blueprint grid background overlay - matches homepage exactly */
-    body:after {
-        content: '';
-        position: fixed;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background-image: 
-            linear-gradient(rgba(100, 181, 246, 0.03) 1px, transparent 1px),
-            linear-gradient(90deg, rgba(100, 181, 246, 0.03) 1px, transparent 1px);
-        background-size: 20px 20px;
-        pointer-events: none;
-        z-index: -1;
-    }
-    
-    /* Make necessary containers transparent to show background */
-    .stApp, section, [data-testid="stHeader"], [data-testid="stToolbar"],
-    [data-testid="stDecoration"], [data-testid="stAppViewContainer"] {
-        background-color: transparent !important;
-    }
-    
-    /* Make text more readable on dark background */
-    .stMarkdown, .stText, caption, label, span, p {
-        color: #E0E0E0 !important;
-    }
-    
-    /* Ensure headers are visible on dark background */
-    h1, h2, h3, h4 {
-        color: white !important;
-    }
-    
-    /* Add blueprint corner accents to containers */
-    .stContainer:before, 
-    [data-testid="column"]:first-child [data-testid="stVerticalBlock"]:before,
-    [data-testid="stSidebar"] [data-testid="stVerticalBlock"] > div:nth-child(3):before {
-        content: '';
-        position: absolute;
-        top: 0;
-        right: 0;
-        width: 80px;
-        height: 80px;
-        background-image: 
-            linear-gradient(rgba(100, 181, 246, 0.07) 1px, transparent 1px),
-            linear-gradient(90deg, rgba(100, 181, 246, 0.07) 1px, transparent 1px);
-        background-size: 10px 10px;
-        opacity: 0.7;
-        border-radius: 0 10px 0 20px;
-        pointer-events: none;
-        z-index: 0;
-    }
-    
-    /* Make ALL buttons green */
-    .stButton button {
-        background-color: #4CAF50 !important;
-        color: white !important;
-        border: none !important;
-    }
-    
-    /* Original styles preserved */
-    .big-title {
-        font-size: 3rem !important;
-        margin-top: -1.5rem !important;
-        margin-bottom: 0.5rem !important;
-    }
-    .subtitle {
-        font-size: 1.2rem !important;
-        margin-top: -0.5rem !important;
-        margin-bottom: 1.5rem !important;
-    }
-    
-    /* Style the status container for better appearance */
-    [data-testid="stVerticalBlock"] > div > [data-testid="stContainer"] {
-        padding: 1rem;
-    }
-    
-    /* Custom styling for directions panel */
-    .directions-panel {
-        background-color: #1E1E1E;
-        color: white;
-        padding: 20px;
-        border-radius: 5px;
-        margin-bottom: 20px;
-    }
-    .directions-panel h1, .directions-panel h2, .directions-panel h3 {
-        color: white;
-    }
-    
-    /* Show user ID indicator in top right */
-    .user-indicator {
-        position: absolute;
-        top: 5px;
-        right: 15px;
-        font-size: 0.8rem;
-        color: #888;
-        padding: 2px 8px;
-        border-radius: 3px;
-        background-color: #f0f0f0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(APP_CSS, unsafe_allow_html=True)
     
     # Add title with custom styling
     st.markdown('<h1 class="big-title">Sanctus Videre 1.0</h1>', unsafe_allow_html=True)
@@ -661,7 +1140,15 @@ def main():
     
     # --- Health Check & Initial Drawings Fetch ---
     try:
-        status = health_check().get('status')
+        # First load of a session needs both health and drawings - overlap them
+        if not st.session_state.drawings and seconds_since_last_success() >= RECENT_SUCCESS_SECONDS:
+            asyncio.run(warm_backend_caches(st.session_state.get("user_id")))
+        
+        # A request that succeeded moments ago already shows the backend is up
+        if seconds_since_last_success() < RECENT_SUCCESS_SECONDS:
+            status = 'ok'
+        else:
+            status = cached_health_check().get('status')
         if status == 'ok':
             st.session_state.backend_healthy = True
             
@@ -673,27 +1160,26 @@ def main():
                 # Fetch drawings
                 refresh_drawings()
             else:
-                logger.info(f"Using existing drawings list with {len(st.session_state.drawings)} items")
+                logger.debug("Using existing drawings list with %d items", len(st.session_state.drawings))
         else:
+            # Don't keep serving a bad result - retry on the next rerun
+            cached_health_check.clear()
             st.error("⚠️ Backend service unavailable.")
     except Exception as e:
+        cached_health_check.clear()
         st.session_state.backend_healthy = False
         st.error(f"⚠️ Health check failed: {e}")
 
     # --- Sidebar: Upload with Directions Button ---
     with st.sidebar:
         # Directions Button - toggles direction visibility
-        if st.button("📋 Directions", use_container_width=True):
-            st.session_state.show_directions = not st.session_state.show_directions
-            # The button click will naturally trigger a rerun
+        st.button("📋 Directions", use_container_width=True, on_click=toggle_directions)
             
         # Show directions panel if enabled
         if st.session_state.show_directions:
             st.markdown('<div class="directions-panel">', unsafe_allow_html=True)
             st.markdown(get_directions_content())
-            if st.button("Close Directions", use_container_width=True):
-                st.session_state.show_directions = False
-                # The button click will naturally trigger a rerun
+            st.button("Close Directions", use_container_width=True, on_click=close_directions)
             st.markdown('</div>', unsafe_allow_html=True)
         
         # Create beautiful container for Upload Drawing section
@@ -717,8 +1203,10 @@ def main():
             # Upload Drawing component
             upload_ok = integrated_upload_drawing()
             if upload_ok:
-                # After upload completes, refresh the list
+                # The upload fragment already cleared the cached list, so
+                # this fetches the new one once and caches it for later reruns
                 refresh_drawings()
+                st.session_state["refresh_drawings_needed"] = True
 
     # --- Three-Column Layout ---
     col1, col2, col3 = st.columns([1, 1, 2])
@@ -727,43 +1215,28 @@ def main():
     with col1:
         # Create a beautiful container for the left column content
         with st.container():
-            # Apply custom styling via HTML/CSS for the left column
-            st.markdown("""
-            <style>
-            /* Style for the left column container */
-            [data-testid="column"]:first-child [data-testid="stVerticalBlock"] {
-                background: linear-gradient(135deg, rgba(30, 30, 30, 0.8), rgba(20, 30, 45, 0.8)) !important;
-                padding: 25px !important;
-                border-radius: 10px !important;
-                border: 1px solid rgba(100, 181, 246, 0.1) !important;
-                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2) !important;
-                margin-top: 5px !important;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            
             st.subheader("Select Drawings")
         
             # Add manual refresh button (new addition to solve the missing drawings issue)
-            if st.button("Refresh Drawings List"):
-                st.session_state["skip_next_refresh"] = False  # Ensure skip flag is off
-                refresh_drawings()
-                st.success("✅ Drawings list refreshed!")
+            if st.button("Refresh Drawings List", on_click=force_refresh_drawings):
+                if st.session_state.get("drawings_refresh_failed"):
+                    st.warning("⚠️ Could not refresh the drawings list - showing the last known list.")
+                else:
+                    st.success("✅ Drawings list refreshed!")
         
             # Special notification if upload just completed
             if st.session_state.get("refresh_drawings_needed", False):
                 st.success("✨ New drawing has been uploaded!")
         
             # Drawing list component (integrated version)
-            selected = integrated_drawing_list(st.session_state.drawings)
-            if selected is not None:
-                st.session_state.selected_drawings = selected
+            integrated_drawing_list(st.session_state.drawings)
 
             # Single delete button for all selected drawings
             if st.session_state.selected_drawings:
                 if st.button("Delete Selected Drawings"):
                     delete_count = 0
                     error_count = 0
+                    deleted = set()
                     
                     # Save a copy of selected drawings to process
                     drawings_to_delete = list(st.session_state.selected_drawings)
@@ -775,111 +1248,156 @@ def main():
                     # Get user_id for deletion
                     user_id = st.session_state.get("user_id")
                     
-                    # Process each drawing from our saved copy
-                    for drawing in drawings_to_delete:
-                        try:
-                            # Log before deletion attempt
-                            logger.info(f"Attempting to delete drawing: {drawing} for user: {user_id}")
-                            
-                            # Call delete API with user_id and capture response
-                            response = delete_drawing(drawing, user_id)
-                            logger.info(f"Delete API response: {response}")
+                    # Delete all drawings from our saved copy in one batch request,
+                    # or concurrently one by one if the backend has no batch endpoint
+                    logger.info(f"Attempting to delete drawings: {drawings_to_delete} for user: {user_id}")
+                    with st.status(f"Deleting {len(drawings_to_delete)} drawing(s)...", expanded=False) as delete_status:
+                        responses = delete_drawings(drawings_to_delete, user_id)
+                        if responses is None:
+                            responses = asyncio.run(delete_drawings_concurrently(drawings_to_delete, user_id))
+                    
+                    # Process each response in the order of our saved copy
+                    for drawing, response in zip(drawings_to_delete, responses):
+                        if isinstance(response, Exception):
+                            logger.error(f"Exception when deleting {drawing}: {response}")
+                            st.error(f"Failed to delete {drawing}: {response}")
+                            error_count += 1
+                            continue
+                        
+                        logger.info(f"Delete API response: {response}")
+                        
+                        # Consider 404 errors as success for UI purposes
+                        if response and response.get('success'):
+                            delete_count += 1
+                            deleted.add(drawing)
+                            logger.info(f"Successfully deleted drawing: {drawing}")
+                        else:
+                            error_msg = response.get('error', 'Unknown error')
+                            logger.error(f"API reported error deleting {drawing}: {error_msg}")
                             
-                            # Consider 404 errors as success for UI purposes
-                            if response and response.get('success'):
+                            # Check if it's a 404 error (drawing not found)
+                            if "404" in str(error_msg) or "not found" in str(error_msg).lower():
+                                # Treat "not found" as success for UI purposes
+                                logger.info(f"Drawing {drawing} not found, treating as already deleted")
                                 delete_count += 1
-                                logger.info(f"Successfully deleted drawing: {drawing}")
+                                deleted.add(drawing)
                             else:
-                                error_msg = response.get('error', 'Unknown error')
-                                logger.error(f"API reported error deleting {drawing}: {error_msg}")
-                                
-                                # Check if it's a 404 error (drawing not found)
-                                if "404" in str(error_msg) or "not found" in str(error_msg).lower():
-                                    # Treat "not found" as success for UI purposes
-                                    logger.info(f"Drawing {drawing} not found, treating as already deleted")
-                                    delete_count += 1
-                                else:
-                                    st.error(f"Failed to delete {drawing}: {error_msg}")
-                                    error_count += 1
-                        except Exception as e:
-                            logger.error(f"Exception when deleting {drawing}: {e}")
-                            st.error(f"Failed to delete {drawing}: {e}")
-                            error_count += 1
+                                st.error(f"Failed to delete {drawing}: {error_msg}")
+                                error_count += 1
                     
-                    # REVISED: Follow the automatic refresh pattern instead of forcing a rerun
-                    # Refresh the drawings list to show current state
-                    refresh_drawings()
+                    # The cached list is stale either way, as are answers about deleted drawings
+                    cached_drawings.clear()
+                    forget_drawing_results(deleted)
+                    
+                    # We already know which drawings are gone, so drop them locally
+                    # instead of refetching the whole list; only go back to the
+                    # backend when some deletion failed and the state is uncertain
+                    if error_count:
+                        refresh_drawings()
+                    else:
+                        st.session_state.drawings = [d for d in st.session_state.drawings if d not in deleted]
+                        st.session_state.drawings_version = None
                     
                     # Set the flag that indicates drawings need to be refreshed
                     # This follows the pattern from automatic refresh
                     st.session_state["refresh_drawings_needed"] = True
                     
-                    # Show summary message
-                    if delete_count > 0:
-                        st.success(f"Successfully processed {delete_count} drawings.")
+                    # Show summary message in place of the progress label
+                    delete_status.update(
+                        label=f"Successfully processed {delete_count} of {len(drawings_to_delete)} drawing(s).",
+                        state="error" if error_count else "complete"
+                    )
 
     # --- Middle Column: Query, Analysis Control & Status ---
     with col2:
         st.subheader("Query & Status")
     
-        # Query input (simplified from query_box component)
-        st.session_state.query = st.text_area(
-            "Type your question here...", 
-            st.session_state.query, 
-            placeholder="Example: What are the finishes specified for the private offices?"
-        )
-        
-        # Cache controls - added Clear Cache button next to Use Cache checkbox
-        col_cache1, col_cache2 = st.columns([1, 1])
-        with col_cache1:
-            st.session_state.use_cache = st.checkbox("Use cache", value=st.session_state.use_cache)
-        with col_cache2:
-            if st.button("Clear Cache"):
-                # Call the clear_cache function with the current user_id
-                response = user_clear_cache()
-                if response and response.get('success'):
-                    st.success("Cache cleared successfully!")
-                else:
-                    error_msg = response.get('error', 'Unknown error')
-                    st.error(f"Failed to clear cache: {error_msg}")
-    
-        # Buttons side by side with new Clear Results button
-        col2a, col2b, col2c = st.columns(3)
+        # Query input and cache option are batched in a form, so editing them
+        # doesn't rerun the page - only submitting does
+        with st.form("analyze_form", clear_on_submit=False, border=False):
+            # Query input (simplified from query_box component)
+            # Keyed to session state, which holds the submitted values
+            query = st.text_area(
+                "Type your question here...", 
+                key="query",
+                placeholder="Example: What are the finishes specified for the private offices?"
+            )
+            use_cache = st.checkbox("Use cache", key="use_cache")
+            analyze_submitted = st.form_submit_button(
+                "Analyze Drawings",
+                disabled=not st.session_state.selected_drawings
+            )
         
-        # Analyze button
-        with col2a:
-            analyze_disabled = not st.session_state.query.strip() or not st.session_state.selected_drawings
-            if st.button("Analyze Drawings", disabled=analyze_disabled):
+        if analyze_submitted:
+            # Stripped once; the check, the cache key and the request all use it
+            query_text = query.strip()
+            job_key = analysis_cache_key(query_text, st.session_state.selected_drawings,
+                                         st.session_state.get("user_id"))
+            if not query_text:
+                st.warning("Please type a question before analyzing.")
+            elif use_cache and job_key in st.session_state.analysis_result_cache:
+                # Asked before in this session - show that answer without a new job
+                result = st.session_state.analysis_result_cache[job_key]
+                st.session_state.analysis_results = result
+                st.session_state.analysis_results_text = json.dumps(result, indent=2) if isinstance(result, dict) else None
+                st.info("Showing the earlier result for this question. Untick 'Use cache' to run it again.")
+            else:
                 try:
                     # Get user_id for analysis
                     user_id = st.session_state.get("user_id")
                     
                     # Start analysis with user_id
-                    resp = start_analysis(
-                        st.session_state.query,
-                        st.session_state.selected_drawings,
-                        st.session_state.use_cache,
-                        user_id
-                    )
+                    with st.status("Starting analysis...", expanded=False) as start_status:
+                        resp = start_analysis(
+                            query_text,
+                            st.session_state.selected_drawings,
+                            use_cache,
+                            user_id
+                        )
                     if resp and 'job_id' in resp:
                         st.session_state.current_job_id = resp['job_id']
+                        st.session_state.current_job_key = job_key
                         st.session_state.job_status = None
-                        
-                        # The button click will naturally trigger a rerun
+                        st.session_state.status_poll_interval = POLL_INTERVAL_MIN
+                        start_status.update(label="Analysis started", state="complete")
                     else:
+                        start_status.update(label="Analysis not started", state="error")
                         st.error(f"Failed to start analysis: {resp}")
                 except Exception as e:
                     st.error(f"Error starting analysis: {str(e)}")
         
+        # Buttons side by side: Clear Cache, Show Results, Clear Results
+        col2a, col2b, col2c = st.columns(3)
+        
+        # Clear Cache button
+        with col2a:
+            if st.button("Clear Cache"):
+                # Call the clear_cache function with the current user_id
+                response = user_clear_cache()
+                if response and response.get('success'):
+                    # Results remembered here were answered from that cache too
+                    st.session_state.analysis_result_cache.clear()
+                    st.success("Cache cleared successfully!")
+                else:
+                    error_msg = response.get('error', 'Unknown error')
+                    st.error(f"Failed to clear cache: {error_msg}")
+        
         # Show Results button
         with col2b:
             show_results_disabled = not st.session_state.current_job_id
             if st.button("Show Results", disabled=show_results_disabled):
                 try:
-                    job = get_job_status(st.session_state.current_job_id)
+                    # Usually already cached from the job's final status update
+                    job = cached_job_status(st.session_state.current_job_id)
                     result = job.get('result')
                     if result:
                         st.session_state.analysis_results = result
+                        st.session_state.analysis_results_text = json.dumps(result, indent=2) if isinstance(result, dict) else None
+                        if st.session_state.current_job_key:
+                            st.session_state.analysis_result_cache[st.session_state.current_job_key] = result
+                            st.session_state.current_job_key = None
+                        st.session_state.job_listeners.pop(st.session_state.current_job_id, None)
+                        st.session_state.job_status_cache.pop(st.session_state.current_job_id, None)
                         st.session_state.current_job_id = None
                         
                         # The button click will naturally trigger a rerun
@@ -890,67 +1408,16 @@ def main():
         
         # Clear Results button
         with col2c:
-            if st.button("Clear Results"):
-                # Simply clear the results
-                st.session_state.analysis_results = None
-                
-                # The button click will naturally trigger a rerun
+            st.button("Clear Results", on_click=clear_results)
     
-        # Job status display - styled with border for better appearance
+        # Job status display - polled inside its own fragment
         if st.session_state.current_job_id:
-            try:
-                # Poll job status
-                job = get_job_status(st.session_state.current_job_id)
-                st.session_state.job_status = job
-        
-                phase = job.get('phase', '')
-                prog = job.get('progress', 0)
-                
-                # Status display in a bordered container with better spacing
-                with st.container(border=True):
-                    # Status indicator
-                    st.markdown(f"**Status:**")
-                    st.markdown(f"### {phase}")
-                    
-                    # Progress indicator
-                    st.progress(prog / 100, text=f"Progress: {prog}%")
-                    
-                    # Progress complete indicator
-                    if prog >= 100 or 'complete' in phase.lower():
-                        st.success("✅ Analysis complete! Click 'Show Results' to view.")
-                
-                    # Recent Updates section
-                    st.markdown("**Recent Updates:**")
-                    logs = job.get('progress_messages', [])
-                    if logs:
-                        for log in logs[-3:]:
-                            # Remove HTML tags and timestamps if present
-                            if " - " in log:
-                                log = log.split(" - ", 1)[1]  # Remove timestamp
-                            clean_log = re.sub(r'<[^>]+>', '', log)
-                            st.info(clean_log)
-                
-                # Auto-refresh while analysis is running
-                if prog < 100 and 'complete' not in phase.lower():
-                    time.sleep(2)  # Brief pause to avoid hammering the API
-                    st.rerun()  # This rerun is needed for the polling loop
-            except Exception as e:
-                st.error(f"Error updating job status: {str(e)}")
+            job_status_fragment()
 
     # --- Right Column: Analysis Results ---
     with col3:
         st.subheader("Analysis Results")
-        
-        # Show appropriate content based on analysis state
-        if st.session_state.current_job_id:
-            # Show "analyzing" message while job is running
-            st.info("Analysis in progress. Results will appear here when complete.")
-        elif st.session_state.analysis_results is not None:
-            # Show results using improved display function
-            integrated_results_pane(st.session_state.analysis_results)
-        else:
-            # Default state
-            st.info("Results will appear here after analysis completes.")
+        results_fragment()
 
 if __name__ == "__main__":
     main()
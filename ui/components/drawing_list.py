@@ -3,9 +3,19 @@
 import streamlit as st
 import re
 
+@st.cache_data(show_spinner=False)
+def visible_drawings(drawings, show_temp_files):
+    """
+    Sorted drawings to list, without temporary ("tmp*") files unless asked for.
+    Cached on the drawings tuple, so unchanged lists skip the filter and sort.
+    """
+    if show_temp_files:
+        return sorted(drawings)
+    return sorted(d for d in drawings if not d.startswith("tmp"))
+
 def drawing_list(drawings):
     """
-    Render a 'Select All' toggle and a checkbox per drawing.
+    Render a 'Select All' toggle and a selectable table of drawings.
     Returns the list of selected drawing names.
     """
     st.subheader("Available Drawings")
@@ -14,30 +24,28 @@ def drawing_list(drawings):
     show_temp_files = st.checkbox("Show Temporary Files", value=False, key="show_temp_files")
     
     # Filter out temporary files if not showing them
-    if not show_temp_files:
-        # Filter out drawings that start with "tmp"
-        filtered_drawings = [d for d in drawings if not d.startswith("tmp")]
-    else:
-        filtered_drawings = drawings
+    filtered_drawings = visible_drawings(tuple(drawings), show_temp_files)
     
     # No drawings after filtering
     if not filtered_drawings:
         st.info("No drawings available. Upload a drawing to get started.")
         return []
     
-    # Selection logic
+    # Selection logic - one data editor instead of a checkbox widget per
+    # drawing; its grid only draws the rows in view, so long lists stay cheap
+    import pandas as pd
     select_all = st.checkbox("Select All Drawings", key="select_all")
-    selected = []
-    
-    if select_all:
+    table = pd.DataFrame({"Select": [select_all] * len(filtered_drawings), "Drawing": filtered_drawings})
+    edited = st.data_editor(
+        table,
+        key="drawing_list_table",
+        hide_index=True,
+        use_container_width=True,
         # Show all checked and disabled so user can't uncheck individually
-        for drawing in filtered_drawings:
-            st.checkbox(drawing, value=True, key=f"cb_{drawing}", disabled=True)
-        selected = filtered_drawings.copy()
-    else:
-        for drawing in filtered_drawings:
-            if st.checkbox(drawing, key=f"cb_{drawing}"):
-                selected.append(drawing)
+        disabled=True if select_all else ["Drawing"],
+        column_config={"Select": st.column_config.CheckboxColumn("Select", default=False)},
+    )
+    selected = edited.loc[edited["Select"], "Drawing"].tolist()
     
     # Display count of available drawings
     total_count = len(drawings)
@@ -14,13 +14,14 @@ def log_console(logs):
         st.text("No log messages available.")
         return
     
-    # Clean any HTML tags from logs
+    # Clean any HTML tags from the logs we show - only the 5 most recent,
+    # so the work doesn't grow with the length of the log
     clean_logs = []
-    for log in logs:
+    for log in logs[-5:]:
         # Use regex to remove HTML tags if present
         clean_log = re.sub(r'<[^>]+>', '', log)
         clean_logs.append(clean_log)
     
     # Display logs in a code block for a console-like appearance
-    log_text = "\n".join(clean_logs[-5:])  # Show only the 5 most recent logs
+    log_text = "\n".join(clean_logs)
     st.code(log_text, language="")
@@ -9,10 +9,61 @@ from typing import Dict, Any, List, Optional, Tuple
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def extract_tile_info(progress_messages: List[str]) -> Dict[str, Any]:
+# Progress message patterns, compiled once at import instead of on every poll.
+# PROGRESS_MESSAGE_RE finds the tile messages extract_tile_info counts in one
+# pass; the named group that matched says which kind it was.
+PROGRESS_MESSAGE_RE = re.compile(
+    r"(?P<total>Generated (?P<total_tiles>\d+) tiles)"
+    r"|(?P<tile>Analyzing (?:content|legend) tile (?P<tile_name>\S+))"
+)
+# API_STATUS_RE does the same for check_api_status. It is kept separate so a
+# tile match can't swallow an API marker later in the same message.
+API_STATUS_RE = re.compile(
+    r"(?P<api_ok>HTTP/1\.1 200 OK)"
+    r"|(?P<api_error>API error)"
+    r"|(?P<api_retry>Retrying)"
+)
+
+# Operations get_current_operation recognises, as (pattern, label) pairs in
+# priority order: the first pattern found anywhere in the message wins.
+OPERATION_PATTERNS = [
+    (re.compile(r"Converting"), "Converting PDF to image"),
+    (re.compile(r"orientation"), "Adjusting image orientation"),
+    (re.compile(r"Creating tiles"), "Dividing image into tiles"),
+    (re.compile(r"^(?=.*Generated).*tiles", re.DOTALL), "Tile generation complete"),
+    (re.compile(r"Analyzing legend"), "Analyzing drawing legends"),
+    (re.compile(r"Analyzing content tile(?: (?P<tile_name>\S+))?"), "Analyzing content in {tile_name}"),
+    (re.compile(r"Analysis completed"), "Analysis complete"),
+    (re.compile(r"Processing failed"), "Processing failed"),
+]
+
+def _new_tile_state() -> Dict[str, Any]:
+    """Empty running state for extract_tile_info."""
+    return {"scanned": 0, "total_tiles": 0, "tiles": set(), "current_tile": ""}
+
+def _scan_tile_messages(messages: List[str], state: Dict[str, Any]) -> None:
+    """Fold progress messages into a tile state (total, processed set, current tile)."""
+    for message in messages:
+        for match in PROGRESS_MESSAGE_RE.finditer(message):
+            kind = match.lastgroup
+            # The first "Generated N tiles" message gives the total
+            if kind == "total" and not state["total_tiles"]:
+                state["total_tiles"] = int(match.group("total_tiles"))
+            elif kind == "tile":
+                tile_name = match.group("tile_name")
+                state["tiles"].add(tile_name)
+                state["current_tile"] = tile_name
+
+def extract_tile_info(progress_messages: List[str], job_id: Optional[str] = None,
+                      message_count: Optional[int] = None) -> Dict[str, Any]:
     """
     Extract information about tile processing from progress messages.
     
+    With a job_id, the running state is kept in session state and only
+    messages that arrived since the previous call are parsed. message_count
+    is the job's total number of messages; the backend only returns the
+    newest ones, so the list length alone stops growing on long jobs.
+    
     Returns a dict with:
     - total_tiles: Total number of tiles detected
     - processed_tiles: Number of tiles processed so far
@@ -27,31 +78,27 @@ def extract_tile_info(progress_messages: List[str]) -> Dict[str, Any]:
     try:
         if not progress_messages:
             return tile_info
+        if message_count is None:
+            message_count = len(progress_messages)
         
-        # Try to find total tile count
-        for message in progress_messages:
-            if "Generated" in message and "tiles" in message:
-                match = re.search(r"Generated (\d+) tiles", message)
-                if match:
-                    tile_info["total_tiles"] = int(match.group(1))
-                    break
-        
-        # Process messages to find current tile and count processed tiles
-        processed_tiles_set = set()
-        current_tile = ""
+        if job_id:
+            state_key = f"tile_state_{job_id}"
+            state = st.session_state.get(state_key)
+            if state is None or message_count < state["scanned"]:
+                # First call for this job, or the message list was replaced
+                state = _new_tile_state()
+                st.session_state[state_key] = state
+        else:
+            state = _new_tile_state()
         
-        for message in progress_messages:
-            # Look for tile processing messages
-            if "Analyzing content tile" in message or "Analyzing legend tile" in message:
-                match = re.search(r"Analyzing (?:content|legend) tile ([^\s]+)", message)
-                if match:
-                    tile_name = match.group(1)
-                    processed_tiles_set.add(tile_name)
-                    current_tile = tile_name
+        new_count = message_count - state["scanned"]
+        _scan_tile_messages(progress_messages[max(len(progress_messages) - new_count, 0):], state)
+        state["scanned"] = message_count
         
         # Update tile info
-        tile_info["processed_tiles"] = len(processed_tiles_set)
-        tile_info["current_tile"] = current_tile
+        tile_info["total_tiles"] = state["total_tiles"]
+        tile_info["processed_tiles"] = len(state["tiles"])
+        tile_info["current_tile"] = state["current_tile"]
         
         return tile_info
     except Exception as e:
@@ -77,18 +124,22 @@ def check_api_status(progress_messages: List[str]) -> Dict[str, Any]:
     }
     
     try:
-        # Process all messages
+        # Process all messages, counting each kind at most once per message
         for message in progress_messages:
+            kinds = {match.lastgroup for match in API_STATUS_RE.finditer(message)}
+            if not kinds:
+                continue
+            
             # Count successful API calls
-            if "HTTP/1.1 200 OK" in message:
+            if "api_ok" in kinds:
                 api_status["success_count"] += 1
             
             # Count errors and retries
-            if "API error" in message:
+            if "api_error" in kinds:
                 api_status["error_count"] += 1
                 api_status["last_error"] = message
             
-            if "Retrying" in message:
+            if "api_retry" in kinds:
                 api_status["retry_count"] += 1
         
         # Determine overall status
@@ -120,25 +171,16 @@ def get_current_operation(progress_messages: List[str]) -> str:
         latest_message = latest_message.split(" - ", 1)[1]
     
     # Look for specific operations
-    if "Converting" in latest_message:
-        return "Converting PDF to image"
-    elif "orientation" in latest_message:
-        return "Adjusting image orientation"
-    elif "Creating tiles" in latest_message:
-        return "Dividing image into tiles"
-    elif "Generated" in latest_message and "tiles" in latest_message:
-        return "Tile generation complete"
-    elif "Analyzing legend" in latest_message:
-        return "Analyzing drawing legends"
-    elif "Analyzing content tile" in latest_message:
-        # Extract tile information
-        match = re.search(r"Analyzing content tile ([^\s]+)", latest_message)
+    for pattern, label in OPERATION_PATTERNS:
+        match = pattern.search(latest_message)
         if match:
-            return f"Analyzing content in {match.group(1)}"
-    elif "Analysis completed" in latest_message:
-        return "Analysis complete"
-    elif "Processing failed" in latest_message:
-        return "Processing failed"
+            if "tile_name" in pattern.groupindex:
+                # A content tile message without a tile name falls through
+                # to the raw message
+                if not match.group("tile_name"):
+                    break
+                return label.format(tile_name=match.group("tile_name"))
+            return label
     
     # Default case
     return latest_message
@@ -190,7 +232,8 @@ def progress_indicator(job_id: str, poll_interval: float = 1.0) -> Dict[str, Any
             st.write(f"**Phase:** {current_phase}")
             
             # Extract tile information
-            tile_info = extract_tile_info(progress_messages)
+            tile_info = extract_tile_info(progress_messages, job_id,
+                                          job_status.get("message_count"))
             total_tiles = tile_info.get("total_tiles", 0)
             processed_tiles = tile_info.get("processed_tiles", 0)
             current_tile = tile_info.get("current_tile", "")